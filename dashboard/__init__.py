@@ -0,0 +1 @@
+# Data and compute helpers for the WhatsApp group dashboard (whatsapp_app.py).
@@ -0,0 +1,118 @@
+"""Headless stage-by-stage benchmark of the dashboard data pipeline.
+
+    python -m dashboard.synthetic --out data/synthetic --messages 1000000
+    python -m dashboard.bench --data data/synthetic --output bench.json
+
+Times loading, each preprocessing stage, filtering and every panel's aggregation for a
+few filter states, and writes the results as JSON for comparing runs.
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from dashboard.loader import LocalSource, fetch_tables
+from dashboard.panels import PANELS, FilterSpec, View, compute
+from dashboard.pipeline import Pipeline
+from dashboard.profiling import Profiler, peak_rss_mb
+
+# Preprocessing stages in dependency order, so each timing covers only its own stage
+PREPROCESS_STAGES = [
+    'media', 'parsed_chat', 'parsed_msgs', 'parsed_reactions', 'parsed_add_leave',
+    'compact', 'filter_engine', 'rollup', 'sketches', 'leaderboard', 'date_bounds',
+]
+
+
+def timed(profiler, stage, func, rows=None, **labels):
+    """Run func() in a profiler section; rows(value) picks what rows_out counts (default the value)."""
+    with profiler.section(stage, **labels) as section:
+        value = func()
+        section.out(value if rows is None else rows(value))
+    record = profiler.records[-1]
+    print(f"{stage:<30} {labels.get('filter', ''):<22} {record['seconds']:9.4f}s", file=sys.stderr)
+    return value
+
+
+def filter_states(pipeline):
+    """A few representative sidebar selections: (name, start, end, group, booth)."""
+    min_date, max_date = pipeline['date_bounds']
+    chat = pipeline['chat']
+    states = [
+        ('all', min_date, max_date, None, None),
+        ('last_30_days', max(min_date, max_date - timedelta(days=29)), max_date, None, None),
+    ]
+    if not chat.empty:
+        busiest_booth = str(chat['booth_number'].value_counts().index[0])
+        states.append(('busiest_booth', min_date, max_date, None, busiest_booth))
+        states.append(('single_group', min_date, max_date, str(chat['chat_name'].iloc[0]), None))
+        states.append(('booth_last_7_days', max(min_date, max_date - timedelta(days=6)), max_date, None, busiest_booth))
+    return states
+
+
+def panel_steps(view):
+    """Each panel's computation for one filter state, plus the sketch-based overview."""
+    steps = [(name, lambda name=name: compute(name, view)) for name in PANELS]
+    steps.append(('overview_sketch', lambda: compute('overview', view, exact=False)))
+    return steps
+
+
+def run(data_dir, trace_memory=False, repeat=1):
+    profiler = Profiler(trace_memory)
+    # fetch_tables returns (frames, timings): count the rows of the loaded frames
+    raw, timings = timed(
+        profiler, 'load', lambda: fetch_tables(LocalSource(data_dir)), rows=lambda loaded: list(loaded[0].values()),
+    )
+    # keep the raw tables and intermediate stages so each stage is timed on its own
+    pipeline = Pipeline(raw, release=False)
+    for name in PREPROCESS_STAGES:
+        timed(profiler, f"preprocess.{name}", lambda name=name: pipeline[name])
+
+    engine = pipeline['filter_engine']
+    for name, start_date, end_date, group, booth in filter_states(pipeline):
+        for _ in range(repeat):
+            # _select bypasses the LRU so repeats measure the filter itself
+            timed(profiler, 'filter', lambda: engine._select(start_date, end_date, group, booth), filter=name)
+        view = View(pipeline, FilterSpec(start_date, end_date, group, booth))
+        view.frames  # build the memoized filter result outside the panel timings
+        for panel, func in panel_steps(view):
+            for _ in range(repeat):
+                timed(profiler, f"panel.{panel}", func, filter=name)
+
+    profiler.finish()
+    return {
+        'meta': {
+            'data_dir': data_dir,
+            'rows': {table: len(df) for table, df in raw.items()},
+            'load_timings': timings,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'run_at': datetime.now(timezone.utc).isoformat(),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        },
+        'results': profiler.records,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', required=True, help='directory of <table>.csv files (see dashboard.synthetic)')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per filter and panel step')
+    parser.add_argument('--trace-memory', action='store_true', help='record per-step peak allocations (slower)')
+    args = parser.parse_args(argv)
+    report = run(args.data, args.trace_memory, args.repeat)
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
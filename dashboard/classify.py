@@ -0,0 +1,50 @@
+import numpy as np
+
+GROUP_CHAT_MARKER = '@g.us'
+
+# Group categories are checked in order and the first matching rule wins. Each condition
+# takes the per-group frame (chat_id, count, admin_count) and returns a boolean mask, so
+# new categories stay vectorized.
+GROUP_CATEGORY_RULES = [
+    ("2-Way Group", lambda groups: groups['count'] == 1),
+    ("Admin Managed Group", lambda groups: groups['admin_count'] >= 1),
+]
+DEFAULT_GROUP_CATEGORY = "Multi-Participant Group (No Admin)"
+
+
+def add_group_category(label, condition, position=None):
+    """Register a group category; position defaults to just before the fallback category."""
+    rule = (label, condition)
+    if position is None:
+        GROUP_CATEGORY_RULES.append(rule)
+    else:
+        GROUP_CATEGORY_RULES.insert(position, rule)
+
+
+def classify_chat_type(chat_ids):
+    """'group' for WhatsApp group IDs, 'private' otherwise."""
+    is_group = chat_ids.astype(str).str.contains(GROUP_CHAT_MARKER, regex=False, na=False)
+    return np.where(is_group, 'group', 'private')
+
+
+def classify_groups(group_sizes, admin_counts, rules=None, default=DEFAULT_GROUP_CATEGORY):
+    """Label each row of group_sizes (chat_id, count) with its group category.
+
+    admin_counts is a Series of admin counts indexed by chat_id; groups missing from it
+    have no admins.
+    """
+    rules = GROUP_CATEGORY_RULES if rules is None else rules
+    groups = group_sizes.assign(
+        admin_count=admin_counts.reindex(np.asarray(group_sizes['chat_id'])).fillna(0).to_numpy()
+    )
+    conditions = [np.asarray(condition(groups), dtype=bool) for _, condition in rules]
+    labels = [label for label, _ in rules]
+    return np.select(conditions, labels, default=default)
+
+
+def group_types(group_members):
+    """Member count, admin count and category per chat_id of group_members."""
+    group_sizes = group_members.groupby('chat_id', observed=True)['contact_phone_number'].nunique().reset_index(name='count')
+    group_admins = group_members[group_members['contact_is_admin'] == True].groupby('chat_id', observed=True)['contact_phone_number'].nunique()
+    group_sizes['type'] = classify_groups(group_sizes, group_admins)
+    return group_sizes
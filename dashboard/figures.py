@@ -0,0 +1,107 @@
+"""Chart figures cached across reruns and sessions, and downsampling for long trends.
+
+Building a Plotly Express figure costs far more than serializing it, and most reruns
+redraw charts whose data did not change. Figures are kept in one process-wide cache keyed
+by a digest of the aggregated frame plus the chart name and layout options, least recently
+used evicted first once their total size passes a memory cap.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Memory cap of the figure cache in MiB
+FIGURE_CACHE_MB_ENV = 'WA_FIGURE_CACHE_MB'
+DEFAULT_FIGURE_CACHE_MB = 64
+
+# Day-wise trends longer than this are summed into weekly, then monthly buckets
+DAILY_POINT_BUDGET = 400
+# bucket -> (resample rule, chart title prefix); buckets start on Mondays / the 1st
+TREND_BUCKETS = {
+    'day': (None, 'Day-wise'),
+    'week': ('W-MON', 'Weekly'),
+    'month': ('MS', 'Monthly'),
+}
+
+
+def frame_digest(frame):
+    """A digest of a frame's columns and values, independent of its index."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(name, str(dtype)) for name, dtype in frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def figure_size(fig):
+    """Approximate memory held by a figure: its pickled size (trace arrays dominate)."""
+    return len(pickle.dumps(fig, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class FigureCache:
+    """Figures per (chart, data digest, layout), capped at max_bytes in total.
+
+    Figures are shared between sessions and must not be modified once cached;
+    st.plotly_chart only reads them.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_FIGURE_CACHE_MB << 20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name, data, build, **layout):
+        """The figure build(data, **layout) draws, built only when not cached."""
+        key = name, frame_digest(data), tuple(sorted(layout.items()))
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key][0]
+            self.misses += 1
+        fig = build(data, **layout)
+        size = figure_size(fig)
+        with self._lock:
+            if size <= self.max_bytes:
+                if key in self._figures:
+                    self.size -= self._figures.pop(key)[1]
+                self._figures[key] = fig, size
+                self.size += size
+                while self.size > self.max_bytes:
+                    self.size -= self._figures.popitem(last=False)[1][1]
+        return fig
+
+
+def resample_trend(trend, max_points=DAILY_POINT_BUDGET, x='date_new', y='Message Count'):
+    """The day-wise trend in the finest bucket that fits max_points, and that bucket's name.
+
+    Counts are summed per week or month, labelled by the bucket's first day, so every
+    message is still counted once; trends within the budget are returned unchanged.
+    """
+    if len(trend) <= max_points:
+        return trend, 'day'
+    series = trend.set_index(x)[y]
+    for bucket, (rule, _) in TREND_BUCKETS.items():
+        if rule is None:
+            continue
+        resampled = series.resample(rule, label='left', closed='left').sum()
+        if len(resampled) <= max_points:
+            break
+    return resampled.rename_axis(x).reset_index(), bucket
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_figure_cache():
+    """The process-wide figure cache, sized from WA_FIGURE_CACHE_MB."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FigureCache(int(float(os.environ.get(FIGURE_CACHE_MB_ENV, DEFAULT_FIGURE_CACHE_MB)) * (1 << 20)))
+        return _cache
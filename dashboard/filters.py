@@ -0,0 +1,190 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+FilteredFrames = namedtuple('FilteredFrames', ['chat', 'members', 'msgs', 'reactions', 'add_leave'])
+
+# Above this many selected chats a date slice is filtered with one isin over chat codes
+# instead of walking each chat's row range
+MAX_CHAT_RANGES = 64
+
+NO_ROWS = np.empty(0, dtype=np.int64)
+
+
+def wall_times(timestamps):
+    """Timestamps as naive datetime64[ns] in their own wall time.
+
+    Values with a UTC offset keep their local clock reading (as .dt.date and .dt.hour
+    read them) instead of being converted to the UTC instant.
+    """
+    if isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+        timestamps = timestamps.dt.tz_localize(None)
+    return timestamps.to_numpy(dtype='datetime64[ns]')
+
+
+def day_numbers(timestamps):
+    """Days since the epoch (of the wall-time date) as int64, with NaT as -1 (pairs with valid mask)."""
+    values = wall_times(timestamps)
+    valid = ~np.isnat(values)
+    days = np.full(len(values), -1, dtype=np.int64)
+    days[valid] = values[valid].astype('datetime64[D]').astype(np.int64)
+    return days, valid
+
+
+def day_number(value):
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+
+class RowIndex:
+    """Time-sorted row positions of one table plus a chat_id -> row range index.
+
+    The frame itself stays in its original order; selections return row positions in
+    that order, so filtered frames match boolean-mask filtering row for row. Rows without
+    a timestamp never match a date range and are left out of the time order.
+    """
+
+    def __init__(self, frame, time_column=None):
+        self.frame = frame
+        if time_column is None:
+            positions = np.arange(len(frame))
+            days = np.zeros(len(frame), dtype=np.int64)
+        else:
+            days, valid = day_numbers(frame[time_column])
+            positions = np.flatnonzero(valid)
+            days = days[valid]
+            order = np.argsort(days, kind='stable')
+            positions, days = positions[order], days[order]
+        self.positions = positions
+        self.days = days
+        self.dated = time_column is not None
+
+        # Group the time-ordered rows by chat code (stable, so each chat stays time-sorted)
+        codes = frame['chat_id'].cat.codes.to_numpy()[positions]
+        self.by_chat = np.argsort(codes, kind='stable')
+        self.codes = codes
+        n_chats = len(frame['chat_id'].cat.categories)
+        self.chat_offsets = np.searchsorted(codes[self.by_chat], np.arange(n_chats + 1))
+
+    def _day_bounds(self, days, start, end):
+        lo = 0 if start is None else np.searchsorted(days, start, side='left')
+        hi = len(days) if end is None else np.searchsorted(days, end, side='right')
+        return lo, hi
+
+    def select(self, start=None, end=None, chat_codes=None):
+        """Row positions within [start, end] (day numbers) and, optionally, the given chats."""
+        if not self.dated:
+            start = end = None
+        if chat_codes is None:
+            lo, hi = self._day_bounds(self.days, start, end)
+            rows = self.positions[lo:hi]
+        elif len(chat_codes) > MAX_CHAT_RANGES:
+            lo, hi = self._day_bounds(self.days, start, end)
+            keep = np.isin(self.codes[lo:hi], chat_codes)
+            rows = self.positions[lo:hi][keep]
+        else:
+            slices = []
+            for code in chat_codes:
+                chat_rows = self.by_chat[self.chat_offsets[code]:self.chat_offsets[code + 1]]
+                lo, hi = self._day_bounds(self.days[chat_rows], start, end)
+                slices.append(chat_rows[lo:hi])
+            rows = self.positions[np.concatenate(slices)] if slices else NO_ROWS
+        return np.sort(rows)
+
+    def take(self, rows):
+        return self.frame.take(rows)
+
+
+class FilterEngine:
+    """Date range / group name / booth number filtering over the prepared tables.
+
+    Built once per dataset: each table gets a RowIndex, and chat rows are looked up by
+    group name and booth number from dictionaries. Results are memoized in an LRU keyed
+    by (start_date, end_date, group, booth) and shared between reruns, so callers must
+    not modify the returned frames.
+    """
+
+    def __init__(self, chat, members, msgs, reactions, add_leave, cache_size=16):
+        self.chat = RowIndex(chat, 'chat_created_at')
+        self.members = RowIndex(members)
+        self.events = {
+            'msgs': RowIndex(msgs, 'timestamp'),
+            'reactions': RowIndex(reactions, 'timestamp'),
+            'add_leave': RowIndex(add_leave, 'timestamp'),
+        }
+        self.chat_rows_by_name = self._lookup(chat['chat_name'])
+        self.chat_rows_by_booth = self._lookup(chat['booth_number'].astype(str))
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _lookup(values):
+        codes, uniques = pd.factorize(values)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+    @staticmethod
+    def _days(start_date, end_date):
+        return (
+            None if start_date is None else day_number(start_date),
+            None if end_date is None else day_number(end_date),
+        )
+
+    def chat_rows(self, start_date=None, end_date=None, group=None, booth=None):
+        rows = self.chat.select(*self._days(start_date, end_date))
+        if group is not None:
+            rows = np.intersect1d(rows, self.chat_rows_by_name.get(group, NO_ROWS))
+        if booth is not None:
+            rows = np.intersect1d(rows, self.chat_rows_by_booth.get(booth, NO_ROWS))
+        return rows
+
+    def chats(self, start_date=None, end_date=None, group=None, booth=None):
+        """Chat rows created in the date range, optionally narrowed to a group and booth."""
+        return self.chat.take(self.chat_rows(start_date, end_date, group, booth))
+
+    def select(self, start_date=None, end_date=None, group=None, booth=None):
+        key = (start_date, end_date, group, booth)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        result = self._select(start_date, end_date, group, booth)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def chat_codes(chat):
+        """Distinct chat_id codes of a filtered chat frame."""
+        codes = np.unique(chat['chat_id'].cat.codes.to_numpy())
+        return codes[codes >= 0]
+
+    def event_chat_codes(self, start_date=None, end_date=None, group=None, booth=None):
+        """chat_id codes msgs, reactions and add_leave are narrowed to; None keeps all chats.
+
+        Events follow the filtered chats only once a group or booth is chosen, otherwise
+        they keep every chat in the date range.
+        """
+        if group is None and booth is None:
+            return None
+        return self.chat_codes(self.chats(start_date, end_date, group, booth))
+
+    def _select(self, start_date, end_date, group, booth):
+        start, end = self._days(start_date, end_date)
+        chat = self.chat.take(self.chat_rows(start_date, end_date, group, booth))
+        chat_codes = self.chat_codes(chat)
+
+        # Members always follow the filtered chats
+        members = self.members.take(self.members.select(chat_codes=chat_codes))
+        event_chats = None if group is None and booth is None else chat_codes
+        events = {
+            name: index.take(index.select(start, end, event_chats))
+            for name, index in self.events.items()
+        }
+        return FilteredFrames(chat, members, events['msgs'], events['reactions'], events['add_leave'])
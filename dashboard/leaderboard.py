@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+from dashboard.filters import day_number
+
+
+def _count_table(reactions):
+    """Reaction counts per (day, chat code, message code), sorted by day."""
+    days = reactions['day'].to_numpy()
+    valid = days >= 0
+    keys = pd.DataFrame({
+        'day': days[valid],
+        'chat': reactions['chat_id'].cat.codes.to_numpy()[valid],
+        'message': reactions['message_id'].cat.codes.to_numpy()[valid],
+    })
+    keys = keys[keys['message'] >= 0]
+    return keys.groupby(['day', 'chat', 'message'], sort=True).size().reset_index(name='count')
+
+
+class ReactionLeaderboard:
+    """Reaction counts keyed by integer message code, for top-k and per-type panels.
+
+    Reactions are pre-counted per (day, chat, message). A filter state slices the day
+    range, sums per message code, keeps the messages that pass the same filters as the
+    msgs table, and only looks up message bodies for the k winners.
+
+    This assumes one msgs row per message_id. The sheet does not enforce that: with
+    repeated ids (unique_messages False) a message's rows can differ in day, chat, body
+    and type, so callers join the filtered tables instead.
+    """
+
+    def __init__(self, msgs, reactions):
+        self.msgs = msgs
+        n_messages = len(msgs['message_id'].cat.categories)
+        codes = msgs['message_id'].cat.codes.to_numpy()
+        present = codes >= 0
+        msg_days = msgs['day'].to_numpy()
+
+        # Per message code: first msgs row, how many msgs rows share it (a merge would
+        # repeat the reactions once per row), its day and chat
+        positions = np.flatnonzero(present)
+        unique_codes, first = np.unique(codes[present], return_index=True)
+        self.first_row = np.full(n_messages, -1, dtype=np.int64)
+        self.first_row[unique_codes] = positions[first]
+        self.multiplicity = np.bincount(codes[present], minlength=n_messages)
+        self.unique_messages = bool((self.multiplicity <= 1).all())
+        self.message_day = np.full(n_messages, -1, dtype=np.int64)
+        self.message_day[unique_codes] = msg_days[positions[first]]
+        self.message_chat = np.full(n_messages, -1, dtype=np.int64)
+        self.message_chat[unique_codes] = msgs['chat_id'].cat.codes.to_numpy()[positions[first]]
+        self.has_body = np.zeros(n_messages, dtype=bool)
+        self.has_body[unique_codes] = (msgs['message_body'].notna() & msgs['mimetype'].notna()).to_numpy()[positions[first]]
+
+        self.counts = _count_table(reactions)
+
+    def reaction_counts(self, start_date, end_date, chat_codes=None):
+        """(message codes, reaction counts) of the reactions passing the filters."""
+        days = self.counts['day'].to_numpy()
+        lo = 0 if start_date is None else np.searchsorted(days, day_number(start_date), side='left')
+        hi = len(days) if end_date is None else np.searchsorted(days, day_number(end_date), side='right')
+        part = self.counts.iloc[lo:hi]
+        if chat_codes is not None:
+            part = part[np.isin(part['chat'].to_numpy(), chat_codes)]
+
+        messages, inverse = np.unique(part['message'].to_numpy(), return_inverse=True)
+        return messages, np.bincount(inverse, weights=part['count'].to_numpy(), minlength=len(messages)).astype(np.int64)
+
+    def message_counts(self, start_date, end_date, chat_codes=None, counts=None):
+        """(message codes, reaction counts) for reactions and messages passing the filters.
+
+        counts, when given, are the selected reactions' (message codes, counts) from
+        elsewhere (the sharded aggregation) instead of this table's.
+        """
+        start = None if start_date is None else day_number(start_date)
+        end = None if end_date is None else day_number(end_date)
+        messages, totals = counts if counts is not None else self.reaction_counts(start_date, end_date, chat_codes)
+
+        # The reacted-to message must itself be in the filtered msgs
+        message_days = self.message_day[messages]
+        keep = self.first_row[messages] >= 0
+        keep &= message_days >= 0
+        if start is not None:
+            keep &= message_days >= start
+        if end is not None:
+            keep &= message_days <= end
+        if chat_codes is not None:
+            keep &= np.isin(self.message_chat[messages], chat_codes)
+        messages = messages[keep]
+        return messages, totals[keep] * self.multiplicity[messages]
+
+    def top(self, k, start_date, end_date, chat_codes=None, counts=None):
+        """The k most reacted messages with body and mimetype, ties broken by message_id."""
+        messages, totals = self.message_counts(start_date, end_date, chat_codes, counts)
+        with_body = self.has_body[messages]
+        messages, totals = messages[with_body], totals[with_body]
+        if len(messages) > k:
+            # Partial selection: everything tied with the k-th largest count is a candidate
+            kth = np.partition(totals, len(totals) - k)[len(totals) - k]
+            candidates = totals >= kth
+            messages, totals = messages[candidates], totals[candidates]
+        order = np.lexsort((messages, -totals))[:k]
+        rows = self.msgs.take(self.first_row[messages[order]])
+        top = rows[['message_id', 'message_body', 'mimetype']].reset_index(drop=True)
+        top['No. of Reactions'] = totals[order]
+        return top
+
+    def counts_by_mimetype(self, start_date, end_date, chat_codes=None, counts=None):
+        """Reactions per mimetype of the reacted-to message, most frequent first."""
+        messages, totals = self.message_counts(start_date, end_date, chat_codes, counts)
+        mimetypes = self.msgs['mimetype'].take(self.first_row[messages])
+        counts = pd.Series(totals, index=mimetypes.to_numpy()).groupby(level=0, observed=True).sum()
+        counts = counts[counts > 0].sort_values(ascending=False)
+        counts.index = counts.index.astype(str)
+        counts.index.name = 'mimetype'
+        return counts.rename('count')
@@ -0,0 +1,131 @@
+import io
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Published Google Sheet backing the dashboard, one gid per tab
+SHEET_URL = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vQC9pyPzVed8E19Ftg7HhgFkIf8hArSRhhfO0u_e7PxluqV2_TnENJOc0uEVWPyN75l49MJbuqERhJC/pub'
+SHEET_GIDS = {
+    'chat': 844866925,
+    'members': 1894345747,
+    'msgs': 2112209162,
+    'reactions': 991085987,
+    'add_leave': 1838297829,
+}
+TABLES = tuple(SHEET_GIDS)
+
+# Set WA_DATA_DIR to a directory of <table>.csv files to read a local mirror instead of the sheet
+DATA_DIR_ENV = 'WA_DATA_DIR'
+
+
+class RemoteSource:
+    """Reads each tab of the published Google Sheet as CSV over HTTP."""
+
+    def __init__(self, url=SHEET_URL, gids=SHEET_GIDS):
+        self.url = url
+        self.gids = dict(gids)
+
+    def location(self, table):
+        return f"{self.url}?gid={self.gids[table]}&single=true&output=csv"
+
+    def read_bytes(self, table, timeout):
+        with urllib.request.urlopen(self.location(table), timeout=timeout) as resp:
+            return resp.read()
+
+    def __repr__(self):
+        return f"RemoteSource({self.url!r})"
+
+
+class LocalSource:
+    """Reads <table>.csv files from a local directory (mirrored copy, benchmarks)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def location(self, table):
+        return os.path.join(self.path, f"{table}.csv")
+
+    def read_bytes(self, table, timeout):
+        with open(self.location(table), 'rb') as f:
+            return f.read()
+
+    def __repr__(self):
+        return f"LocalSource({self.path!r})"
+
+
+def default_source():
+    data_dir = os.environ.get(DATA_DIR_ENV)
+    return LocalSource(data_dir) if data_dir else RemoteSource()
+
+
+def is_transient(exc):
+    """Whether a failed read may succeed on retry: timeouts, dropped connections, HTTP 5xx/429.
+
+    Anything else (a missing mirror file, a bad gid's 4xx) fails the same way every time.
+    """
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code >= 500 or exc.code == 429
+    if isinstance(exc, urllib.error.URLError):
+        exc = exc.reason
+    return isinstance(exc, TimeoutError | ConnectionError)
+
+
+def fetch_bytes(source, table, timeout=30, retries=3, backoff=1.0):
+    """Read one tab's CSV bytes, retrying transient failures with exponential backoff.
+
+    Returns (raw, attempts, seconds of the successful attempt).
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        start = time.perf_counter()
+        try:
+            raw = source.read_bytes(table, timeout)
+        except OSError as exc:
+            # urllib errors and socket timeouts are OSError subclasses
+            if attempt > retries or not is_transient(exc):
+                raise
+            time.sleep(backoff * 2 ** (attempt - 1))
+            continue
+        return raw, attempt, time.perf_counter() - start
+
+
+def fetch_table(source, table, timeout=30, retries=3, backoff=1.0):
+    """Fetch and parse one tab, retrying transient failures with exponential backoff.
+
+    Returns (frame, timing) where timing records the attempts, fetch and parse seconds.
+    """
+    raw, attempts, fetch_s = fetch_bytes(source, table, timeout, retries, backoff)
+    fetched = time.perf_counter()
+    df = pd.read_csv(io.BytesIO(raw))
+    timing = {
+        'table': table,
+        'attempts': attempts,
+        'bytes': len(raw),
+        'rows': len(df),
+        'fetch_s': fetch_s,
+        'parse_s': time.perf_counter() - fetched,
+    }
+    return df, timing
+
+
+def fetch_tables(source=None, tables=TABLES, max_workers=5, timeout=30, retries=3, backoff=1.0):
+    """Fetch all tabs concurrently on a bounded thread pool.
+
+    Returns ({table: frame}, [timing, ...]). The first tab that still fails after its
+    retries re-raises its error.
+    """
+    source = source or default_source()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tables)))) as pool:
+        futures = {
+            table: pool.submit(fetch_table, source, table, timeout, retries, backoff)
+            for table in tables
+        }
+        results = {table: future.result() for table, future in futures.items()}
+    frames = {table: df for table, (df, _) in results.items()}
+    timings = [timing for _, timing in results.values()]
+    return frames, timings
@@ -0,0 +1,158 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Output column -> keys tried in order in the msgs['media'] JSON payload
+MEDIA_FIELDS = {
+    'mimetype': ('mimetype',),
+    'media_size': ('file_size', 'size'),
+    'media_duration': ('seconds', 'duration'),
+}
+NUMERIC_FIELDS = ('media_size', 'media_duration')
+
+# Payloads are parsed in batches of this many rows to bound the size of the joined string
+CHUNK_SIZE = 100_000
+# A chunk that fails as a whole is re-parsed in sub-batches of this many rows, split
+# further around malformed payloads; at most MIN_BATCH rows are parsed one by one
+SPLIT_SIZE = 2048
+MIN_BATCH = 16
+
+
+def _parse_batch(payloads):
+    """Parse a list of JSON object strings with a single json.loads call.
+
+    Returns None when the batch contains anything that is not a JSON object, so the caller
+    can fall back to row-by-row parsing.
+    """
+    try:
+        parsed = json.loads('[' + ','.join(payloads) + ']')
+    except ValueError:
+        return None
+    # A malformed payload can still join into valid JSON with a different shape
+    if len(parsed) != len(payloads) or not all(isinstance(item, dict) for item in parsed):
+        return None
+    return parsed
+
+
+def _payload_at(payloads, pos):
+    """Index of the payload holding character pos of '[' + ','.join(payloads) + ']'."""
+    ends = np.cumsum([len(payload) + 1 for payload in payloads])
+    return min(int(np.searchsorted(ends, pos - 1, side='right')), len(payloads) - 1)
+
+
+def _parse_split(payloads):
+    """Parse payloads in batches, parsing only the malformed ones one by one.
+
+    A batch that does not decode is split at the payload the error points to: the rows
+    before it are parsed as a batch again and that payload on its own, then parsing
+    continues after it. A batch that decodes into the wrong shape is halved.
+    Returns (items, rows parsed one by one).
+    """
+    items, row_parsed = [], 0
+    while payloads:
+        if len(payloads) <= MIN_BATCH:
+            items.extend(_parse_rows(payloads))
+            return items, row_parsed + len(payloads)
+        try:
+            parsed = json.loads('[' + ','.join(payloads) + ']')
+        except ValueError as exc:
+            # An unterminated payload can push the error into a later one; the rows
+            # before it are checked again as their own batch
+            split = _payload_at(payloads, getattr(exc, 'pos', 0))
+            head, head_rows = _parse_split(payloads[:split])
+            items.extend(head)
+            items.extend(_parse_rows(payloads[split:split + 1]))
+            row_parsed += head_rows + 1
+            payloads = payloads[split + 1:]
+            continue
+        if len(parsed) == len(payloads) and all(isinstance(item, dict) for item in parsed):
+            items.extend(parsed)
+            return items, row_parsed
+        half = len(payloads) // 2
+        head, head_rows = _parse_split(payloads[:half])
+        items.extend(head)
+        row_parsed += head_rows
+        payloads = payloads[half:]
+    return items, row_parsed
+
+
+def _parse_rows(payloads):
+    parsed = []
+    for payload in payloads:
+        try:
+            item = json.loads(payload)
+        except ValueError:
+            item = None
+        parsed.append(item if isinstance(item, dict) else None)
+    return parsed
+
+
+def decode_media(media, null_mimetype='text'):
+    """Decode the msgs['media'] JSON column into typed columns in one batch pass.
+
+    Rows without media get null_mimetype; payloads that are not valid JSON objects are
+    counted in the returned stats and left null instead of raising.
+    Returns (frame indexed like media, stats).
+    """
+    present = media.notna().to_numpy()
+    text = media[present].astype(str)
+    payloads = text.tolist()
+
+    # Payloads not even shaped like one object (truncated ones, say) are parsed on their
+    # own up front instead of failing a batch
+    stripped = text.str.strip()
+    shaped = (stripped.str.startswith('{') & stripped.str.endswith('}')).to_numpy(dtype=bool)
+    unshaped = np.flatnonzero(~shaped)
+    fallback_chunks, fallback_rows = 0, len(unshaped)
+    if len(unshaped):
+        batched = [payloads[i] for i in np.flatnonzero(shaped)]
+    else:
+        batched = payloads
+
+    parsed = []
+    for start in range(0, len(batched), CHUNK_SIZE):
+        chunk = batched[start:start + CHUNK_SIZE]
+        items = _parse_batch(chunk)
+        if items is None:
+            # Only the sub-batches around malformed payloads lose the batch parse
+            fallback_chunks += 1
+            items = []
+            for sub_start in range(0, len(chunk), SPLIT_SIZE):
+                sub_items, rows = _parse_split(chunk[sub_start:sub_start + SPLIT_SIZE])
+                items.extend(sub_items)
+                fallback_rows += rows
+        parsed.extend(items)
+    if len(unshaped):
+        merged = np.empty(len(payloads), dtype=object)
+        merged[shaped] = np.array(parsed + [None], dtype=object)[:-1]
+        merged[unshaped] = np.array(_parse_rows([payloads[i] for i in unshaped]) + [None], dtype=object)[:-1]
+        parsed = merged.tolist()
+
+    # Build the payload columns in one pass over the dicts, then coalesce each field's keys
+    wanted = [key for keys in MEDIA_FIELDS.values() for key in keys]
+    records = pd.DataFrame.from_records(
+        [item if item is not None else {} for item in parsed], columns=wanted
+    )
+    decoded = pd.DataFrame(index=media.index)
+    for column, keys in MEDIA_FIELDS.items():
+        values = records[keys[0]]
+        for key in keys[1:]:
+            values = values.combine_first(records[key])
+        if column in NUMERIC_FIELDS:
+            values = pd.to_numeric(values, errors='coerce')
+        full = pd.Series(np.nan if column in NUMERIC_FIELDS else None, index=media.index,
+                         dtype=values.dtype if column in NUMERIC_FIELDS else object)
+        full[present] = values.to_numpy()
+        decoded[column] = full
+    decoded['mimetype'] = decoded['mimetype'].where(present, null_mimetype)
+
+    malformed = sum(item is None for item in parsed)
+    stats = {
+        'rows': len(media),
+        'with_media': len(payloads),
+        'malformed': malformed,
+        'fallback_chunks': fallback_chunks,
+        'fallback_rows': fallback_rows,
+    }
+    return decoded, stats
@@ -0,0 +1,295 @@
+"""Dashboard panel computations, independent of Streamlit.
+
+Each panel is a function of a View (one filter selection over a pipeline) returning the
+frame or record the dashboard renders, so panels can be reused, precomputed and served
+from dashboard.precompute without going through the app.
+"""
+import inspect
+import threading
+from collections import OrderedDict, namedtuple
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from dashboard.classify import group_types
+from dashboard.poc import poc_summary
+from dashboard.shards import get_shard_set
+from dashboard.tables import PagedTable
+
+# The sidebar selection; None means no restriction
+FilterSpec = namedtuple('FilterSpec', ['start_date', 'end_date', 'group', 'booth'], defaults=(None, None, None, None))
+
+MIMETYPE_LABELS = {
+    'text': 'Text',
+    'video/mp4': 'Video',
+    'image/jpeg': 'Image',
+    'audio/mpeg': 'Audio',
+}
+
+# Columns of the message drill-down; search matches the text ones
+MESSAGE_COLUMNS = ['Date', 'Hour', 'Group Name', 'Sender', 'Msg Type', 'Message']
+MESSAGE_SEARCH_COLUMNS = ['Group Name', 'Sender', 'Msg Type', 'Message']
+
+# name -> (function, filtered tables it reads)
+PANELS = {}
+
+
+def panel(name, *tables):
+    def register(func):
+        PANELS[name] = (func, tables)
+        return func
+    return register
+
+
+class View:
+    """One filter selection over a pipeline; filtered frames are only built when a panel reads them."""
+
+    def __init__(self, pipeline, spec):
+        self.pipeline = pipeline
+        self.spec = FilterSpec(*spec)
+        self.engine = pipeline['filter_engine']
+
+    @cached_property
+    def frames(self):
+        return self.engine.select(*self.spec)
+
+    @cached_property
+    def event_chat_codes(self):
+        return self.engine.event_chat_codes(*self.spec)
+
+    @cached_property
+    def shards(self):
+        """The ShardSet when WA_SHARD_WORKERS enables sharded aggregation, else None."""
+        return get_shard_set(self.pipeline)
+
+    @property
+    def counts(self):
+        """Source of message and add/leave counts: the shards when enabled, else the rollup cube."""
+        return self.shards if self.shards is not None else self.pipeline['rollup']
+
+    @property
+    def reaction_counts(self):
+        """Selected reactions per message code from the shards, or None to use the leaderboard's."""
+        return None if self.shards is None else self.shards.reaction_counts(*self.rollup_slice)
+
+    @property
+    def rollup_slice(self):
+        """(start_date, end_date, chat codes) for the rollup cube, sketches and leaderboard."""
+        return self.spec.start_date, self.spec.end_date, self.event_chat_codes
+
+    def inputs(self, name):
+        """The filtered tables a panel reads."""
+        return tuple(getattr(self.frames, table) for table in PANELS[name][1])
+
+
+class PanelCache:
+    """Panel results per (data, selection, panel, options), least recently used evicted first.
+
+    The app keeps one per session, so a rerun that leaves a panel's inputs unchanged
+    reuses its result instead of recomputing it.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data_key, spec, name, options):
+        return data_key, tuple(FilterSpec(*spec)), name, tuple(sorted(options.items()))
+
+    def get(self, key):
+        """(True, result) when cached, else (False, None); results can be None."""
+        with self._lock:
+            if key not in self._results:
+                return False, None
+            self._results.move_to_end(key)
+            return True, self._results[key]
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+
+def compute(name, view, **options):
+    func, _ = PANELS[name]
+    return func(view, **options)
+
+
+def uses_defaults(name, options):
+    """Whether options leave every option of the panel at its default, as precompute computes it."""
+    func, _ = PANELS[name]
+    defaults = {
+        parameter.name: parameter.default
+        for parameter in inspect.signature(func).parameters.values()
+        if parameter.default is not inspect.Parameter.empty
+    }
+    return all(option in defaults and value == defaults[option] for option, value in options.items())
+
+
+def compute_all(view, names=None):
+    return {name: compute(name, view) for name in (names or PANELS)}
+
+
+@panel('overview', 'chat', 'members', 'msgs')
+def overview(view, exact=True):
+    """Overview card values; with exact=False distinct participants come from the sketches."""
+    chat, members, msgs = view.inputs('overview')
+    total_groups = chat['chat_id'].nunique()
+    # total_participants and unique_participants are based on members of the *filtered* groups
+    total_participants = members['contact_phone_number'].count()
+    if exact:
+        unique_participants = members['contact_phone_number'].nunique()
+        if view.shards is not None:
+            active_participants = view.shards.active_participants(*view.rollup_slice)
+        else:
+            active_participants = msgs['sender_phone'].nunique()
+    else:
+        sketches = view.pipeline['sketches']
+        unique_participants = sketches.unique_members(view.engine.chat_codes(chat))
+        active_participants = sketches.active_participants(*view.rollup_slice)
+    groups_with_msgs = view.counts.active_chat_count(*view.rollup_slice)
+    return {
+        'total_groups': total_groups,
+        'total_participants': total_participants,
+        'unique_participants': unique_participants,
+        'percent_active': active_participants / total_participants * 100 if total_participants > 0 else 0,
+        'percent_active_groups': groups_with_msgs / total_groups * 100 if total_groups > 0 else 0,
+        'estimated': not exact,
+    }
+
+
+@panel('group_types', 'members')
+def group_type_counts(view):
+    (members,) = view.inputs('group_types')
+    counts = group_types(members)['type'].value_counts().reset_index()
+    counts.columns = ['Group Type', 'Count']
+    return counts
+
+
+@panel('message_types', 'msgs')
+def message_type_counts(view):
+    counts = view.counts.message_type_counts(*view.rollup_slice).reset_index()
+    counts.columns = ['Msg Type', 'Count']
+    counts['Msg Type'] = counts['Msg Type'].replace(MIMETYPE_LABELS)
+    return counts
+
+
+def _reacted_rows(view, columns):
+    """Selected reactions joined to every selected msgs row sharing their message_id.
+
+    The leaderboard needs unique message_ids; with repeated ones the panels count over this
+    join, as the dashboard originally did.
+    """
+    msgs, reactions = view.frames.msgs, view.frames.reactions
+    rows = reactions[['message_id']].merge(msgs[['message_id', *columns]], on='message_id', how='inner')
+    return rows.astype({column: object for column in rows.columns})
+
+
+@panel('reaction_types', 'msgs', 'reactions')
+def reaction_type_counts(view):
+    """Reactions per type of the reacted-to message; None without both messages and reactions."""
+    msgs, reactions = view.inputs('reaction_types')
+    if reactions.empty or msgs.empty:
+        return None
+    leaderboard = view.pipeline['leaderboard']
+    if leaderboard.unique_messages:
+        # Reactions are counted per message code and attributed to the message's type
+        counts = leaderboard.counts_by_mimetype(*view.rollup_slice, view.reaction_counts).reset_index()
+    else:
+        counts = _reacted_rows(view, ['mimetype'])['mimetype'].value_counts().reset_index()
+    counts.columns = ['Msg Type', 'Reaction Count']
+    counts['Msg Type'] = counts['Msg Type'].replace(MIMETYPE_LABELS)
+    return counts
+
+
+@panel('top_reacted', 'reactions')
+def top_reacted_messages(view, k=5):
+    leaderboard = view.pipeline['leaderboard']
+    if leaderboard.unique_messages:
+        # Count reactions per message, pick the top k, then look up only their body and mimetype
+        top = leaderboard.top(k, *view.rollup_slice, view.reaction_counts)
+    else:
+        columns = ['message_id', 'message_body', 'mimetype']
+        top = _reacted_rows(view, columns[1:]).groupby(columns).size().reset_index(name='No. of Reactions')
+        top = top.nlargest(k, 'No. of Reactions').reset_index(drop=True)
+    return top.rename(columns={'message_body': 'Message', 'mimetype': 'Msg Type'}).drop(columns=['message_id'])
+
+
+@panel('add_leave', 'chat', 'add_leave')
+def add_leave_summary(view):
+    """Participants added and left per group, for groups with at least one of either."""
+    chat, _ = view.inputs('add_leave')
+    counts = view.counts
+    added = counts.add_leave_counts('add', *view.rollup_slice, name='Participants Added')
+    left = counts.add_leave_counts('leave', *view.rollup_slice, name='Participants Left')
+
+    # Merge with chat data to get group names and booth numbers
+    summary = chat[['chat_id', 'chat_name', 'booth_number']].drop_duplicates().merge(
+        added, on='chat_id', how='left'
+    ).merge(
+        left, on='chat_id', how='left'
+    )
+    # Only the counts are filled: the categorical chat columns cannot take a 0
+    count_columns = ['Participants Added', 'Participants Left']
+    summary[count_columns] = summary[count_columns].fillna(0).astype(int)
+    summary = summary.rename(columns={
+        'chat_name': 'Group Name',
+        'booth_number': 'Booth Number'
+    }).drop(columns=['chat_id'])
+    return summary[(summary['Participants Added'] >= 1) | (summary['Participants Left'] >= 1)].copy()
+
+
+@panel('poc', 'members', 'msgs', 'reactions')
+def poc_analysis(view):
+    # Group admins as POCs; one grouped aggregation over the filtered frames
+    return poc_summary(*view.inputs('poc'))
+
+
+@panel('hourly', 'msgs')
+def hourly_trend(view):
+    trend = view.counts.hourly_counts(*view.rollup_slice)
+    trend['hour_label'] = np.char.mod('%02d:00', trend['hour'].to_numpy())
+    return trend
+
+
+@panel('daily', 'msgs')
+def daily_trend(view):
+    # date_new is datetime for Plotly
+    return view.counts.daily_counts(*view.rollup_slice)
+
+
+def message_table(view, sender=None, group=None, booth=None):
+    """Selected messages sent by one POC or posted in one group, newest first, as a PagedTable.
+
+    A drill-down from a POC or add/leave row rather than a registered panel, so it is
+    never precomputed. group and booth name one group as its add/leave row shows it.
+    """
+    msgs = view.frames.msgs
+    keep = np.ones(len(msgs), dtype=bool)
+    if sender is not None:
+        keep &= (msgs['sender_phone'] == sender).to_numpy()
+    if group is not None:
+        booth = None if booth is None else str(booth)
+        chats = view.engine.chats(view.spec.start_date, view.spec.end_date, group, booth)
+        keep &= np.isin(msgs['chat_id'].cat.codes.to_numpy(), view.engine.chat_codes(chats))
+    rows = msgs[keep].sort_values('timestamp', ascending=False, kind='stable', na_position='last')
+
+    chat = view.pipeline['chat'].drop_duplicates('chat_id')
+    names = pd.Series(chat['chat_name'].to_numpy(), index=chat['chat_id'].cat.codes.to_numpy())
+    days, hours = rows['day'].to_numpy(), rows['hour'].to_numpy()
+    dates = days.astype('datetime64[D]')
+    dates[days < 0] = np.datetime64('NaT')
+    listing = pd.DataFrame({
+        'Date': dates,
+        'Hour': pd.Series(hours, dtype='Int8').where(hours >= 0).array,
+        'Group Name': names.reindex(rows['chat_id'].cat.codes.to_numpy()).to_numpy(),
+        'Sender': rows['sender_phone'].to_numpy(),
+        'Msg Type': rows['mimetype'].astype(object).replace(MIMETYPE_LABELS).to_numpy(),
+        'Message': rows['message_body'].to_numpy(),
+    }, columns=MESSAGE_COLUMNS)
+    return PagedTable(listing, MESSAGE_SEARCH_COLUMNS)
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dashboard.classify import classify_chat_type
+from dashboard.filters import FilterEngine
+from dashboard.leaderboard import ReactionLeaderboard
+from dashboard.media import decode_media
+from dashboard.rollup import RollupCube
+from dashboard.schema import compact_frames
+from dashboard.sketch import ParticipantSketches
+from dashboard.timestamps import add_time_columns, combine_date_time, day_dates, parse_datetimes
+
+# Preprocessing runs as named stages computed on first access and memoized per dataset.
+# Each stage declares the stages (or raw tables) it reads, so panels that never ask for an
+# output never pay for it.
+STAGES = {}
+# Intermediate stages only read on the way to 'compact'; once it is built they are released
+# together with the raw tables, leaving only the compacted frames in memory
+TRANSIENT_STAGES = set()
+RELEASE_AFTER = 'compact'
+
+
+def stage(name, *deps, transient=False):
+    def register(func):
+        STAGES[name] = (func, deps)
+        if transient:
+            TRANSIENT_STAGES.add(name)
+        return func
+    return register
+
+
+def content_hash(frames):
+    """Stable digest of the raw tables (column names plus row hashes)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for table in sorted(frames):
+        df = frames[table]
+        digest.update(table.encode())
+        digest.update(json.dumps([str(c) for c in df.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """Lazily evaluated preprocessing stages over one set of raw tables.
+
+    Stage outputs are shared between reruns and sessions, so callers must treat them as
+    read-only and copy before adding columns. With release (the default) the raw tables
+    and transient stages are dropped once RELEASE_AFTER is built; stages reading only
+    those are built first, so they stay available.
+    """
+
+    def __init__(self, frames, key=None, release=True):
+        # raw tables are addressed by stages as 'raw_chat', 'raw_msgs', ...
+        self.raw = {f"raw_{table}": df for table, df in frames.items()}
+        self.key = key or content_hash(frames)
+        self.release = release
+        self.released = False
+        self._outputs = {}
+        # seconds each stage took to build, excluding the stages it reads
+        self.timings = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, name):
+        if name in self.raw:
+            return self.raw[name]
+        with self._lock:
+            if name not in self._outputs:
+                if self.released and (name in TRANSIENT_STAGES or name.startswith('raw_')):
+                    raise KeyError(f"{name} was released after {RELEASE_AFTER} was built")
+                func, deps = STAGES[name]
+                inputs = [self[dep] for dep in deps]
+                start = time.perf_counter()
+                self._outputs[name] = func(*inputs)
+                self.timings[name] = time.perf_counter() - start
+                if name == RELEASE_AFTER and self.release:
+                    self._release()
+            return self._outputs[name]
+
+    def _release(self):
+        released = TRANSIENT_STAGES | set(self.raw)
+        for name, (_, deps) in STAGES.items():
+            if name not in released and set(deps) <= released:
+                self[name]
+        self.raw = {}
+        for name in TRANSIENT_STAGES:
+            self._outputs.pop(name, None)
+        self.released = True
+
+    def computed(self):
+        return list(self._outputs)
+
+
+_pipelines = OrderedDict()
+_pipelines_lock = threading.Lock()
+
+
+def get_pipeline(frames, key=None, max_entries=2):
+    """Return the memoized pipeline for these raw tables, building it on a new content hash."""
+    key = key or content_hash(frames)
+    with _pipelines_lock:
+        if key in _pipelines:
+            _pipelines.move_to_end(key)
+            return _pipelines[key]
+        pipeline = Pipeline(frames, key)
+        _pipelines[key] = pipeline
+        while len(_pipelines) > max_entries:
+            _pipelines.popitem(last=False)
+        return pipeline
+
+
+@stage('parsed_chat', 'raw_chat', transient=True)
+def prepare_chat(chat):
+    chat = chat.copy()
+    # Standardize chat timestamps
+    chat['chat_created_at'] = parse_datetimes(chat['chat_created_at'], dayfirst=True)
+    add_time_columns(chat, 'chat_created_at')
+    chat['chat_name'] = chat['chat_name'].str.strip()
+
+    # Extract booth number and drop rows without one
+    chat['booth_number'] = chat['chat_name'].str.extract(r'(\d+)$')
+    chat = chat.dropna(subset=['booth_number'])
+
+    # Drop rows with empty chat_name and those containing "#ERROR!"
+    chat = chat[
+        (chat['chat_name'] != '') &
+        (~chat['chat_name'].str.contains('#ERROR!', na=False))
+    ].copy()
+
+    # Infer chat_type from chat_id. Adjust if 'chat_type' is directly in your CSV.
+    chat['chat_type'] = classify_chat_type(chat['chat_id'])
+    return chat
+
+
+@stage('media', 'raw_msgs', transient=True)
+def prepare_media(msgs):
+    # (mimetype/media_size/media_duration frame, decode stats)
+    return decode_media(msgs['media'])
+
+
+@stage('media_stats', 'media')
+def prepare_media_stats(media):
+    # decode stats (malformed payloads, fallback rows), kept after the release
+    return media[1]
+
+
+@stage('parsed_msgs', 'raw_msgs', 'media', transient=True)
+def prepare_msgs(msgs, media):
+    msgs = msgs.copy()
+    msgs['timestamp'] = combine_date_time(msgs['received_at_date'], msgs['received_at_time'])
+    add_time_columns(msgs, 'timestamp')
+    decoded, _ = media
+    msgs[list(decoded.columns)] = decoded
+    return msgs
+
+
+@stage('parsed_reactions', 'raw_reactions', transient=True)
+def prepare_reactions(reactions):
+    reactions = reactions.copy()
+    reactions['timestamp'] = parse_datetimes(reactions['timestamp'])
+    add_time_columns(reactions, 'timestamp')
+    return reactions
+
+
+@stage('parsed_add_leave', 'raw_add_leave', transient=True)
+def prepare_add_leave(add_leave):
+    add_leave = add_leave.copy()
+    add_leave['timestamp'] = parse_datetimes(add_leave['timestamp'])
+    add_time_columns(add_leave, 'timestamp')
+    return add_leave
+
+
+@stage('compact', 'parsed_chat', 'raw_members', 'parsed_msgs', 'parsed_reactions', 'parsed_add_leave')
+def prepare_compact(chat, members, msgs, reactions, add_leave):
+    # Shared categorical IDs across the five tables; phone IDs are cleaned for display here.
+    # Returns (frames, dtypes, memory report).
+    return compact_frames({
+        'chat': chat,
+        'members': members,
+        'msgs': msgs,
+        'reactions': reactions,
+        'add_leave': add_leave,
+    })
+
+
+@stage('chat', 'compact')
+def compact_chat(compact):
+    return compact[0]['chat']
+
+
+@stage('members', 'compact')
+def compact_members(compact):
+    return compact[0]['members']
+
+
+@stage('msgs', 'compact')
+def compact_msgs(compact):
+    return compact[0]['msgs']
+
+
+@stage('reactions', 'compact')
+def compact_reactions(compact):
+    return compact[0]['reactions']
+
+
+@stage('add_leave', 'compact')
+def compact_add_leave(compact):
+    return compact[0]['add_leave']
+
+
+@stage('filter_engine', 'chat', 'members', 'msgs', 'reactions', 'add_leave')
+def prepare_filter_engine(chat, members, msgs, reactions, add_leave):
+    return FilterEngine(chat, members, msgs, reactions, add_leave)
+
+
+@stage('rollup', 'msgs', 'add_leave')
+def prepare_rollup(msgs, add_leave):
+    return RollupCube(msgs, add_leave)
+
+
+@stage('sketches', 'msgs', 'members')
+def prepare_sketches(msgs, members):
+    return ParticipantSketches(msgs, members)
+
+
+@stage('leaderboard', 'msgs', 'reactions')
+def prepare_leaderboard(msgs, reactions):
+    return ReactionLeaderboard(msgs, reactions)
+
+
+@stage('date_bounds', 'chat', 'msgs', 'reactions', 'add_leave')
+def prepare_date_bounds(chat, msgs, reactions, add_leave):
+    # Find min/max dates across all relevant dataframes, from their day numbers
+    days = np.concatenate([frame['day'].to_numpy() for frame in (chat, msgs, reactions, add_leave)])
+    days = days[days >= 0]
+    if len(days) == 0:
+        return datetime.now().date(), datetime.now().date()
+    min_date, max_date = day_dates([days.min(), days.max()])
+    return min_date, max_date
+
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from dashboard.timestamps import day_dates
+
+POC_COLUMNS = [
+    'POC Phone Number',
+    'Total Groups (Admin Of)',
+    'Active Groups (Sent Msgs)',
+    'Total Messages Sent',
+]
+EXTRA_METRICS = ('Reactions Received', 'Last Active Date', 'Messages per Group')
+
+
+def poc_summary(group_members, msgs, reactions=None, extra_metrics=EXTRA_METRICS):
+    """Per-POC (group admin) metrics from one grouped aggregation per table.
+
+    POCs are the admins in group_members, in order of first appearance. 'Reactions Received'
+    counts reactions on messages the POC sent and needs reactions; the other extra
+    metrics come from the same aggregation over msgs.
+    """
+    admins = group_members.loc[group_members['contact_is_admin'] == True, ['contact_phone_number', 'chat_id']]
+    # plain labels, so the per-POC lookups below are not categorical
+    pocs = np.asarray(admins['contact_phone_number'].unique())
+    summary = pd.DataFrame({'POC Phone Number': pocs})
+    if len(pocs) == 0:
+        return summary.reindex(columns=POC_COLUMNS + list(extra_metrics))
+
+    admin_of = admins.groupby('contact_phone_number', observed=True)['chat_id'].nunique()
+
+    poc_msgs = msgs[msgs['sender_phone'].isin(pocs)]
+    by_sender = poc_msgs.groupby('sender_phone', observed=True).agg(
+        active_groups=('chat_id', 'nunique'),
+        total_messages=('chat_id', 'size'),
+        last_active=('day', 'max'),
+    )
+    by_sender['last_active'] = day_dates(by_sender['last_active'])
+
+    received = None
+    if 'Reactions Received' in extra_metrics and reactions is not None and not reactions.empty:
+        # Attribute each reaction to the sender of the message it reacts to
+        message_sender = poc_msgs[['message_id', 'sender_phone']].drop_duplicates('message_id')
+        received = reactions[['message_id']].merge(message_sender, on='message_id')['sender_phone'].value_counts()
+    return assemble_poc_summary(summary, admin_of, by_sender, received, extra_metrics)
+
+
+def assemble_poc_summary(summary, admin_of, by_sender, received=None, extra_metrics=EXTRA_METRICS):
+    """Fill the POC table from per-phone aggregates.
+
+    summary has one 'POC Phone Number' row per POC; admin_of counts admin groups per
+    phone, by_sender has active_groups, total_messages and last_active per sender phone and
+    received counts reactions per sender phone.
+    """
+    summary['Total Groups (Admin Of)'] = summary['POC Phone Number'].map(admin_of).fillna(0).astype(int)
+    summary['Active Groups (Sent Msgs)'] = summary['POC Phone Number'].map(by_sender['active_groups']).fillna(0).astype(int)
+    summary['Total Messages Sent'] = summary['POC Phone Number'].map(by_sender['total_messages']).fillna(0).astype(int)
+
+    if 'Reactions Received' in extra_metrics:
+        received = pd.Series(dtype='int64') if received is None else received
+        summary['Reactions Received'] = summary['POC Phone Number'].map(received).fillna(0).astype(int)
+    if 'Last Active Date' in extra_metrics:
+        summary['Last Active Date'] = summary['POC Phone Number'].map(by_sender['last_active'])
+    if 'Messages per Group' in extra_metrics:
+        active = summary['Active Groups (Sent Msgs)']
+        summary['Messages per Group'] = np.where(
+            active > 0, summary['Total Messages Sent'] / active.where(active > 0, 1), 0.0
+        ).round(2)
+    return summary
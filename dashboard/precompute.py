@@ -0,0 +1,175 @@
+"""Precompute dashboard panels for common filter selections.
+
+    python -m dashboard.precompute [--out .cache/panels]
+
+Loads the tables the same way the app does (WA_DATA_DIR / snapshot), computes every panel
+for all groups over the full date range, each booth, and the last 7 and 30 days, and
+writes them under the content hash of the raw tables. The app serves a stored view when
+the sidebar selection matches one and the data is unchanged.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+
+from dashboard.loader import default_source
+from dashboard.panels import PANELS, FilterSpec, View, compute
+from dashboard.pipeline import content_hash, get_pipeline
+from dashboard.snapshot import default_store, load_tables
+
+try:
+    import pyarrow as pa
+except ImportError:  # precomputed panels are optional, the app computes every view
+    pa = None
+
+# Directory holding precomputed panels; set WA_PANEL_DIR to an empty string to disable it
+PANEL_DIR_ENV = 'WA_PANEL_DIR'
+DEFAULT_PANEL_DIR = '.cache/panels'
+
+
+def common_views(pipeline):
+    """{view name: FilterSpec} for the selections most sessions land on."""
+    min_date, max_date = pipeline['date_bounds']
+    views = {'all': FilterSpec(min_date, max_date)}
+    for days in (7, 30):
+        views[f"last_{days}_days"] = FilterSpec(max(min_date, max_date - timedelta(days=days - 1)), max_date)
+    booths = pipeline['filter_engine'].chats(min_date, max_date)['booth_number'].dropna().unique()
+    for booth in sorted(str(booth) for booth in booths):
+        views[f"booth_{booth}"] = FilterSpec(min_date, max_date, booth=booth)
+    return views
+
+
+def _spec_key(spec):
+    # dates from the sidebar and from date_bounds compare equal as ISO days
+    return [pd.Timestamp(value).date().isoformat() if isinstance(value, date) else value for value in spec]
+
+
+def _write_arrow(path, df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+class PanelStore:
+    """Panel results per view as Arrow IPC files, tagged with the data's content hash.
+
+    Frames are stored as is, record panels (overview) as a one-row frame and panels with
+    no result as a manifest entry only. A write builds a new directory and swaps it in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.path, 'manifest.json')
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def find(self, data_key, spec):
+        """(directory name, manifest entry) of the stored view for this data and selection, or None."""
+        manifest = self.manifest()
+        if manifest is None or manifest['data_key'] != data_key:
+            return None
+        key = _spec_key(FilterSpec(*spec))
+        for name, view in manifest['views'].items():
+            if view['spec'] == key:
+                return name, view
+        return None
+
+    def load(self, data_key, spec):
+        """{panel: result} for a stored view, or None when this selection was not precomputed."""
+        found = self.find(data_key, spec)
+        if found is None:
+            return None
+        name, view = found
+        results = {}
+        for panel, kind in view['panels'].items():
+            if kind == 'none':
+                results[panel] = None
+                continue
+            path = os.path.join(self.path, name, f"{panel}.arrow")
+            df = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all().to_pandas()
+            results[panel] = df.iloc[0].to_dict() if kind == 'record' else df
+        return results
+
+    def write(self, data_key, views):
+        """Replace the store with {view name: (spec, {panel: result})} for data_key."""
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        manifest = {'data_key': data_key, 'written_at': datetime.now(timezone.utc).isoformat(), 'views': {}}
+        for name, (spec, results) in views.items():
+            os.makedirs(os.path.join(tmp_path, name))
+            kinds = {}
+            for panel, result in results.items():
+                if result is None:
+                    kinds[panel] = 'none'
+                    continue
+                if isinstance(result, dict):
+                    kinds[panel], result = 'record', pd.DataFrame([result])
+                else:
+                    kinds[panel] = 'frame'
+                _write_arrow(os.path.join(tmp_path, name, f"{panel}.arrow"), result)
+            manifest['views'][name] = {'spec': _spec_key(spec), 'panels': kinds}
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap the new store in; readers see either the old or the new manifest
+        old_path = f"{self.path}.old-{os.getpid()}"
+        if os.path.exists(self.path):
+            os.replace(self.path, old_path)
+        os.replace(tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+def default_panel_store():
+    if pa is None:
+        return None
+    path = os.environ.get(PANEL_DIR_ENV, DEFAULT_PANEL_DIR)
+    return PanelStore(path) if path else None
+
+
+def precompute(pipeline, store, views=None):
+    """Compute every panel for each view and write them to store; returns seconds per view."""
+    views = views or common_views(pipeline)
+    results = {}
+    seconds = {}
+    for name, spec in views.items():
+        start = time.perf_counter()
+        view = View(pipeline, spec)
+        results[name] = (spec, {panel: compute(panel, view) for panel in PANELS})
+        seconds[name] = time.perf_counter() - start
+    store.write(pipeline.key, results)
+    return seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default=None, help=f"panel store directory (default: ${PANEL_DIR_ENV} or {DEFAULT_PANEL_DIR})")
+    args = parser.parse_args(argv)
+    if pa is None:
+        parser.error('pyarrow is required to write precomputed panels')
+    store = PanelStore(args.out) if args.out else default_panel_store()
+    if store is None:
+        parser.error(f"no panel store: pass --out or set {PANEL_DIR_ENV}")
+
+    frames = load_tables(default_source(), default_store())
+    pipeline = get_pipeline(frames, content_hash(frames))
+    seconds = precompute(pipeline, store)
+    for name, value in seconds.items():
+        print(f"{name:<30} {value:8.3f}s", file=sys.stderr)
+    print(f"{len(seconds)} views written to {store.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+# Set WA_PROFILE_LOG to a file path to append every dashboard run's sections as one JSON line
+PROFILE_LOG_ENV = 'WA_PROFILE_LOG'
+DEFAULT_LOG = os.path.join('.cache', 'profile.jsonl')
+
+MB = 2 ** 20
+
+# tracemalloc is process-wide; concurrent sessions share one trace
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / MB
+
+
+def row_count(value):
+    """Rows in a frame or series (or a row count), summed over a tuple of them; None for anything else."""
+    if isinstance(value, pd.DataFrame | pd.Series):
+        return len(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, tuple | list):
+        counts = [row_count(item) for item in value]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+def default_log_path():
+    return os.environ.get(PROFILE_LOG_ENV) or DEFAULT_LOG
+
+
+class Section:
+    """One timed block; out() records the rows it produced and passes the value through."""
+
+    def __init__(self, name, rows_in=None, **labels):
+        self.record = {'section': name, **labels, 'rows_in': row_count(rows_in), 'rows_out': None}
+
+    def out(self, value):
+        self.record['rows_out'] = row_count(value)
+        return value
+
+
+class Profiler:
+    """Wall time, rows in/out and (optionally) allocations for named sections of one run.
+
+    Sections are sequential and must not nest: begin() closes any open section. With
+    trace_memory on, each section records its net allocation delta and peak above its
+    starting point from tracemalloc, which slows the traced code down noticeably. The
+    trace and tracemalloc.reset_peak() are process-global, so with several sessions
+    running at once each section's delta and peak include the others' allocations.
+    """
+
+    def __init__(self, trace_memory=False):
+        global _tracing_users
+        self.trace_memory = trace_memory
+        self.records = []
+        self.started_at = datetime.now(timezone.utc)
+        self.finished = False
+        self._start = time.perf_counter()
+        self._open = None
+        if trace_memory:
+            with _tracing_lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                _tracing_users += 1
+
+    def begin(self, name, rows_in=None, **labels):
+        self.end()
+        section = Section(name, rows_in, **labels)
+        if self.trace_memory:
+            section.memory_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        section.started = time.perf_counter()
+        self._open = section
+        return section
+
+    def end(self, rows_out=None):
+        section, self._open = self._open, None
+        if section is None:
+            return None
+        record = section.record
+        record['seconds'] = round(time.perf_counter() - section.started, 6)
+        if rows_out is not None:
+            section.out(rows_out)
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            record['alloc_delta_mb'] = round((current - section.memory_before) / MB, 3)
+            record['peak_alloc_mb'] = round((peak - section.memory_before) / MB, 3)
+        record['peak_rss_mb'] = round(peak_rss_mb(), 1)
+        self.records.append(record)
+        return record
+
+    @contextmanager
+    def section(self, name, rows_in=None, **labels):
+        section = self.begin(name, rows_in, **labels)
+        try:
+            yield section
+        finally:
+            self.end()
+
+    def finish(self):
+        """Close the open section and release the allocation trace; returns total seconds."""
+        global _tracing_users
+        self.end()
+        self.finished = True
+        if self.trace_memory:
+            self.trace_memory = False
+            with _tracing_lock:
+                _tracing_users -= 1
+                if _tracing_users == 0:
+                    tracemalloc.stop()
+        return time.perf_counter() - self._start
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self._start
+
+    def frame(self):
+        return pd.DataFrame(self.records)
+
+    def append_log(self, path=None, **meta):
+        """Append this run as one JSON line: run metadata plus the section records."""
+        path = path or default_log_path()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entry = {
+            'run_at': self.started_at.isoformat(),
+            'total_seconds': round(self.total_seconds, 6),
+            **meta,
+            'sections': self.records,
+        }
+        with open(path, 'a') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
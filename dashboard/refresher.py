@@ -0,0 +1,155 @@
+"""Process-wide dataset with a background refresher.
+
+Every session reads the current Dataset, an immutable snapshot of the tables' row counts
+and their pipeline (which keeps only the compacted tables once built). A daemon thread refreshes the tabs on a schedule (or when asked), builds
+and warms the next pipeline off the request path, and swaps it in with one reference
+assignment; until then sessions keep serving the previous snapshot. Only the very first
+load of a process, before any snapshot exists, waits for I/O.
+"""
+import os
+import sys
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from dashboard.loader import default_source
+from dashboard.pipeline import content_hash, get_pipeline
+from dashboard.shards import get_shard_set
+from dashboard.snapshot import default_store, load_tables, refresh_snapshot
+
+# Seconds between background refreshes; 0 only refreshes when requested
+REFRESH_SECONDS_ENV = 'WA_REFRESH_SECONDS'
+DEFAULT_REFRESH_SECONDS = 900
+
+# Stages built before a new snapshot is swapped in, so the first rerun on it is warm
+# (sketches back the overview's default approximate counts on large datasets)
+WARM_STAGES = ('compact', 'date_bounds', 'filter_engine', 'rollup', 'leaderboard', 'sketches')
+
+# version counts swaps since the process started; rows holds each raw table's row count
+# (the raw frames themselves are released by the pipeline); loaded_at is when this data was
+# swapped in and checked_at when a refresh last confirmed it is current
+Dataset = namedtuple('Dataset', ['version', 'key', 'rows', 'pipeline', 'loaded_at', 'checked_at'])
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class DatasetManager:
+    """Serves the current Dataset and replaces it from a background refresh thread."""
+
+    def __init__(self, source=None, store=None, interval=DEFAULT_REFRESH_SECONDS, warm=WARM_STAGES):
+        self.source = source or default_source()
+        self.store = store
+        self.interval = interval
+        self.warm = warm
+        self.refreshing = False
+        self.full_requested = False
+        self.last_error = None
+        self.last_stats = None
+        # whether the served dataset is what the snapshot holds; a refresh that wrote to the
+        # snapshot but failed before the swap leaves it False
+        self.in_sync = False
+        self._dataset = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _build(self, frames, version):
+        key = content_hash(frames)
+        pipeline = get_pipeline(frames, key)
+        for name in self.warm:
+            pipeline[name]
+        # The shard set too when WA_SHARD_WORKERS enables sharded aggregation
+        get_shard_set(pipeline)
+        now = _now()
+        rows = {table: len(df) for table, df in frames.items()}
+        return Dataset(version, key, rows, pipeline, now, now)
+
+    def current(self):
+        """The dataset to serve; loads the first one if nothing has been loaded yet."""
+        dataset = self._dataset
+        if dataset is not None:
+            return dataset
+        with self._lock:
+            if self._dataset is None:
+                self._dataset = self._build(load_tables(self.source, self.store), 1)
+                self.in_sync = True
+            return self._dataset
+
+    def age(self):
+        """Seconds since the current data was swapped in."""
+        return (_now() - self.current().loaded_at).total_seconds()
+
+    def refresh(self, full=False):
+        """Fetch the tabs and swap in a new dataset if they changed; returns whether it did.
+
+        full rewrites the whole snapshot instead of appending to it, for rows edited or
+        removed in the append-only tabs.
+        """
+        previous = self.current()
+        if self.store is not None:
+            # Appends only rows newer than the stored watermarks, then re-reads the snapshot
+            in_sync, self.in_sync = self.in_sync, False
+            stats = self.last_stats = refresh_snapshot(self.store, self.source, full=full)
+            if in_sync and not (stats['full'] or stats['replaced'] or any(stats['appended'].values())):
+                # Nothing was written, so the snapshot still holds the served data
+                return self._unchanged(previous)
+        frames = load_tables(self.source, self.store)
+        if content_hash(frames) == previous.key:
+            return self._unchanged(previous)
+        dataset = self._build(frames, previous.version + 1)
+        with self._lock:
+            self._dataset = dataset
+            self.in_sync = True
+        return True
+
+    def _unchanged(self, previous):
+        with self._lock:
+            self._dataset = previous._replace(checked_at=_now())
+            self.in_sync = True
+        return False
+
+    def request_refresh(self, full=False):
+        """Ask the background thread to refresh now (a full rebuild with full=True), without waiting for it."""
+        self.start()
+        self.full_requested = self.full_requested or full
+        self.refreshing = True
+        self._wake.set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='dataset-refresher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval or None)
+            self._wake.clear()
+            self.refreshing = True
+            full, self.full_requested = self.full_requested, False
+            try:
+                self.refresh(full)
+                self.last_error = None
+            except Exception as exc:  # keep serving the previous snapshot
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                print(f"dataset refresh failed: {self.last_error}", file=sys.stderr)
+            finally:
+                self.refreshing = False
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_dataset_manager():
+    """The process-wide manager over the default source and snapshot, started on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            interval = float(os.environ.get(REFRESH_SECONDS_ENV, DEFAULT_REFRESH_SECONDS))
+            _manager = DatasetManager(default_source(), default_store(), interval)
+        manager = _manager
+    manager.start()
+    return manager
@@ -0,0 +1,134 @@
+import pandas as pd
+
+# Identifier columns that share one categorical dtype across tables, so isin filters and
+# merges between tables compare integer codes. clean=True strips the '@c.us'/'@g.us'
+# suffixes for display, on the distinct values only.
+SHARED_CATEGORIES = {
+    'chat_id': {
+        'columns': [('chat', 'chat_id'), ('members', 'chat_id'), ('msgs', 'chat_id'),
+                    ('reactions', 'chat_id'), ('add_leave', 'chat_id')],
+        'clean': False,
+    },
+    'phone': {
+        'columns': [('members', 'contact_phone_number'), ('msgs', 'sender_phone'),
+                    ('reactions', 'sender_id')],
+        'clean': True,
+    },
+    'message_id': {
+        'columns': [('msgs', 'message_id'), ('reactions', 'message_id')],
+        'clean': False,
+    },
+}
+
+# Low-cardinality columns stored as per-table categoricals
+CATEGORY_COLUMNS = [
+    ('chat', 'chat_name'),
+    ('chat', 'booth_number'),
+    ('chat', 'chat_type'),
+    ('msgs', 'mimetype'),
+    ('add_leave', 'type'),
+]
+
+# Raw columns already decoded into typed columns upstream and not read afterwards
+DROP_COLUMNS = [
+    ('msgs', 'media'),
+]
+
+
+def clean_labels(values):
+    return pd.Index(values).astype(str).str.replace('@c.us', '').str.replace('@g.us', '')
+
+
+def _factorize(frames, columns, clean):
+    """Factorize each column once; returns {(table, column): (codes, labels)}."""
+    factors = {}
+    for table, column in columns:
+        if table not in frames or column not in frames[table].columns:
+            continue
+        codes, uniques = pd.factorize(frames[table][column])
+        labels = clean_labels(uniques) if clean else pd.Index(uniques)
+        factors[(table, column)] = (codes, labels)
+    return factors
+
+
+def shared_dtype(factors):
+    categories = None
+    for _, labels in factors.values():
+        labels = labels.unique()
+        categories = labels if categories is None else categories.union(labels)
+    return pd.CategoricalDtype(categories if categories is not None else [])
+
+
+def _recode(codes, labels, dtype):
+    # Map this column's local codes to positions in the shared categories; -1 stays missing
+    positions = dtype.categories.get_indexer(labels)
+    new_codes = positions[codes]
+    new_codes[codes == -1] = -1
+    return pd.Categorical.from_codes(new_codes, dtype=dtype)
+
+
+def memory_usage(frames, shared=()):
+    """Deep memory per table in bytes.
+
+    Columns using one of the shared dtypes are counted by their codes only; the shared
+    categories are reported once by shared_memory_usage.
+    """
+    usage = {}
+    for table, df in frames.items():
+        total = 0
+        for column in df.columns:
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype) and series.dtype in shared:
+                total += series.cat.codes.nbytes
+            else:
+                total += series.memory_usage(deep=True, index=False)
+        usage[table] = int(total + df.index.memory_usage(deep=True))
+    return usage
+
+
+def shared_memory_usage(dtypes):
+    return int(sum(dtype.categories.memory_usage(deep=True) for dtype in dtypes))
+
+
+def compact_frames(frames):
+    """Return (compacted frames, dtypes, memory report) for the five prepared tables.
+
+    Frames are shallow-copied before columns are replaced, the inputs are left untouched.
+    """
+    before = memory_usage(frames)
+    compacted = {table: df.copy(deep=False) for table, df in frames.items()}
+
+    for table, column in DROP_COLUMNS:
+        if table in compacted and column in compacted[table].columns:
+            compacted[table] = compacted[table].drop(columns=column)
+
+    dtypes = {}
+    for name, spec in SHARED_CATEGORIES.items():
+        factors = _factorize(compacted, spec['columns'], spec['clean'])
+        dtype = shared_dtype(factors)
+        dtypes[name] = dtype
+        for (table, column), (codes, labels) in factors.items():
+            compacted[table][column] = _recode(codes, labels, dtype)
+
+    for table, column in CATEGORY_COLUMNS:
+        if table in compacted and column in compacted[table].columns:
+            compacted[table][column] = compacted[table][column].astype('category')
+
+    after = memory_usage(compacted, shared=list(dtypes.values()))
+    after['shared IDs'] = shared_memory_usage(dtypes.values())
+    before['shared IDs'] = 0
+    report = pd.DataFrame({
+        'Table': list(after),
+        'Before (MB)': [before[table] / 2 ** 20 for table in after],
+        'After (MB)': [after[table] / 2 ** 20 for table in after],
+    }).round(2)
+    return compacted, dtypes, report
+
+
+def observed_value_counts(series):
+    """value_counts() without the zero rows a categorical reports for unused categories."""
+    counts = series.value_counts()
+    counts = counts[counts > 0]
+    if isinstance(counts.index, pd.CategoricalIndex):
+        counts.index = counts.index.astype(counts.index.categories.dtype)
+    return counts
@@ -0,0 +1,367 @@
+"""Partitioned aggregation of msgs, reactions and add_leave on a process pool.
+
+With WA_SHARD_WORKERS set, the event tables are split by a hash of chat_id into one shard
+per worker, written once per dataset as Arrow IPC files of integer codes, and every
+count panel aggregates the shards in parallel: each worker memory-maps its shard,
+slices the selected days, keeps the selected chats and returns small partial aggregates
+(counts per mimetype/hour/day/chat and type, distinct senders, reactions per message)
+that are merged here. ShardSet answers the same queries as RollupCube.
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dashboard.filters import day_number
+
+try:
+    import pyarrow as pa
+except ImportError:  # sharding is optional, panels read the rollup cube instead
+    pa = None
+
+# Number of worker processes (and shards); unset or 0 keeps the single-process panels
+SHARD_WORKERS_ENV = 'WA_SHARD_WORKERS'
+SHARD_DIR_ENV = 'WA_SHARD_DIR'
+DEFAULT_SHARD_DIR = '.cache/shards'
+
+# Integer columns per table, each shard sorted by day
+SHARD_COLUMNS = {
+    'msgs': ['day', 'chat', 'hour', 'mimetype', 'sender'],
+    'reactions': ['day', 'chat', 'message'],
+    'add_leave': ['day', 'chat', 'type'],
+}
+HOURS = 24
+
+
+def _codes(series, dtype=np.int32):
+    return series.cat.codes.to_numpy().astype(dtype)
+
+
+def shard_columns(msgs, reactions, add_leave):
+    """{table: {column: array}} of the rows with a timestamp, as categorical codes."""
+    tables = {}
+    valid = msgs['day'].to_numpy() >= 0
+    tables['msgs'] = {
+        'day': msgs['day'].to_numpy()[valid],
+        'chat': _codes(msgs['chat_id'])[valid],
+        'hour': msgs['hour'].to_numpy()[valid],
+        'mimetype': _codes(msgs['mimetype'], np.int16)[valid],
+        'sender': _codes(msgs['sender_phone'])[valid],
+    }
+    valid = reactions['day'].to_numpy() >= 0
+    tables['reactions'] = {
+        'day': reactions['day'].to_numpy()[valid],
+        'chat': _codes(reactions['chat_id'])[valid],
+        'message': _codes(reactions['message_id'])[valid],
+    }
+    valid = add_leave['day'].to_numpy() >= 0
+    tables['add_leave'] = {
+        'day': add_leave['day'].to_numpy()[valid],
+        'chat': _codes(add_leave['chat_id'])[valid],
+        'type': _codes(add_leave['type'], np.int8)[valid],
+    }
+    return tables
+
+
+def chat_shards(chat_dtype, n_shards):
+    """Shard number per chat_id code, from a hash of the chat_id label."""
+    labels = np.asarray(chat_dtype.categories, dtype=object)
+    return (pd.util.hash_array(labels) % np.uint64(n_shards)).astype(np.int32)
+
+
+def _write_table(path, columns):
+    table = pa.table(columns)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+# Memory-mapped shard tables opened by this worker process, per shard set directory;
+# tables of all but the most recently used MAPPED_SETS shard sets are released
+MAPPED_SETS = 2
+_mapped = OrderedDict()
+
+
+def _read_table(path):
+    root = os.path.dirname(os.path.dirname(path))
+    tables = _mapped.setdefault(root, {})
+    _mapped.move_to_end(root)
+    while len(_mapped) > MAPPED_SETS:
+        _mapped.popitem(last=False)
+    if path not in tables:
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        tables[path] = {name: table.column(name).to_numpy() for name in table.column_names}
+    return tables[path]
+
+
+def _select(columns, start, end, chat_codes):
+    days = columns['day']
+    lo = 0 if start is None else np.searchsorted(days, start, side='left')
+    hi = len(days) if end is None else np.searchsorted(days, end, side='right')
+    part = {name: values[lo:hi] for name, values in columns.items()}
+    if chat_codes is not None:
+        keep = np.isin(part['chat'], chat_codes)
+        part = {name: values[keep] for name, values in part.items()}
+    return part
+
+
+def aggregate_shard(directory, start, end, chat_codes, n_mimetypes, n_types):
+    """Partial aggregates of one shard for a day range and chat codes (runs in a worker)."""
+    msgs = _select(_read_table(os.path.join(directory, 'msgs.arrow')), start, end, chat_codes)
+    reactions = _select(_read_table(os.path.join(directory, 'reactions.arrow')), start, end, chat_codes)
+    add_leave = _select(_read_table(os.path.join(directory, 'add_leave.arrow')), start, end, chat_codes)
+    mimetypes = msgs['mimetype']
+    messages = reactions['message']
+    types = add_leave['type']
+    chats = add_leave['chat']
+    has_type = (types >= 0) & (chats >= 0)
+    return {
+        'mimetype': np.bincount(mimetypes[mimetypes >= 0], minlength=n_mimetypes),
+        'hour': np.bincount(msgs['hour'], minlength=HOURS),
+        'day': np.unique(msgs['day'], return_counts=True),
+        'senders': np.unique(msgs['sender'][msgs['sender'] >= 0]),
+        'chats': int(np.unique(msgs['chat'][msgs['chat'] >= 0]).size),
+        'reactions': np.unique(messages[messages >= 0], return_counts=True),
+        'add_leave': np.unique(chats[has_type].astype(np.int64) * n_types + types[has_type], return_counts=True),
+    }
+
+
+def _merge_counts(parts):
+    """Sum (keys, counts) pairs from several shards."""
+    keys = np.concatenate([part[0] for part in parts])
+    counts = np.concatenate([part[1] for part in parts])
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.int64)
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """Shared process pool, with forked workers.
+
+    Streamlit installs the app script as __main__. Spawned and forkserver workers
+    re-import __main__ from its path, so they would re-run the whole dashboard script.
+
+    Forking from the threaded server is safe here because a worker only runs
+    aggregate_shard: numpy over memory-mapped Arrow files. It never takes the pipeline,
+    refresher or shard-set locks that other threads may hold at fork time, and it
+    starts no threads. CPython re-initialises the import and logging locks after a
+    fork, and numpy and pyarrow reset their thread pools in at-fork handlers. The pool
+    forks its workers once, when first used, and keeps them.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+            _pool_workers = workers
+        return _pool
+
+
+class ShardSet:
+    """Event tables split by chat_id hash and persisted for memory-mapped workers.
+
+    Query methods take (start_date, end_date, chat_codes) like RollupCube. Merged results
+    are memoized per selection, since several panels read the same one.
+    """
+
+    def __init__(self, path, n_shards, chat_dtype, mimetype_dtype, type_dtype, cache_size=16):
+        self.path = path
+        self.n_shards = n_shards
+        self.chat_dtype = chat_dtype
+        self.mimetypes = mimetype_dtype.categories
+        self.types = type_dtype.categories
+        self.shard_of_chat = chat_shards(chat_dtype, n_shards)
+        # whether this process wrote the directory (and so may delete it)
+        self.created = False
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, path, msgs, reactions, add_leave, n_shards):
+        """Write the shards under path (reusing a complete earlier write) and return the set."""
+        shard_set = cls(path, n_shards, msgs['chat_id'].dtype, msgs['mimetype'].dtype, add_leave['type'].dtype)
+        manifest_path = os.path.join(path, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                if json.load(f).get('shards') == n_shards:
+                    return shard_set
+
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        rows = {}
+        for table, columns in shard_columns(msgs, reactions, add_leave).items():
+            chats = columns['chat']
+            # rows without a chat_id go to the first shard
+            shard = np.where(chats >= 0, shard_set.shard_of_chat[np.maximum(chats, 0)], 0)
+            order = np.lexsort((columns['day'], shard))
+            bounds = np.searchsorted(shard[order], np.arange(n_shards + 1))
+            for i in range(n_shards):
+                rows_i = order[bounds[i]:bounds[i + 1]]
+                directory = shard_set._directory(i, tmp_path)
+                os.makedirs(directory, exist_ok=True)
+                _write_table(os.path.join(directory, f"{table}.arrow"),
+                             {name: values[rows_i] for name, values in columns.items()})
+            rows[table] = int(len(chats))
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+            json.dump({'shards': n_shards, 'rows': rows}, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        shard_set.created = True
+        return shard_set
+
+    def _directory(self, shard, root=None):
+        return os.path.join(root or self.path, f"shard-{shard:03d}")
+
+    def totals(self, start_date, end_date, chat_codes=None):
+        start = None if start_date is None else day_number(start_date)
+        end = None if end_date is None else day_number(end_date)
+        key = (start, end, None if chat_codes is None else np.asarray(chat_codes).tobytes())
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        shards = range(self.n_shards)
+        if chat_codes is not None:
+            # Only the shards holding the selected chats have matching rows
+            shards = np.unique(self.shard_of_chat[np.asarray(chat_codes, dtype=np.int64)])
+        pool = get_pool(self.n_shards)
+        futures = [
+            pool.submit(aggregate_shard, self._directory(i), start, end, chat_codes, len(self.mimetypes), len(self.types))
+            for i in shards
+        ]
+        parts = [future.result() for future in futures]
+        result = self._merge(parts)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _merge(self, parts):
+        empty = (np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+        return {
+            'mimetype': sum((part['mimetype'] for part in parts), np.zeros(len(self.mimetypes), dtype=np.int64)),
+            'hour': sum((part['hour'] for part in parts), np.zeros(HOURS, dtype=np.int64)),
+            'day': _merge_counts([part['day'] for part in parts] or [empty]),
+            'senders': int(np.unique(np.concatenate([part['senders'] for part in parts] or [empty[0]])).size),
+            'chats': sum(part['chats'] for part in parts),
+            'reactions': _merge_counts([part['reactions'] for part in parts] or [empty]),
+            'add_leave': _merge_counts([part['add_leave'] for part in parts] or [empty]),
+        }
+
+    def message_type_counts(self, start_date, end_date, chat_codes=None):
+        """Messages per mimetype, most frequent first (like value_counts)."""
+        counts = pd.Series(self.totals(start_date, end_date, chat_codes)['mimetype'], index=self.mimetypes.astype(str))
+        counts = counts[counts > 0].sort_values(ascending=False)
+        counts.index.name = 'mimetype'
+        return counts.rename('count')
+
+    def hourly_counts(self, start_date, end_date, chat_codes=None):
+        counts = self.totals(start_date, end_date, chat_codes)['hour']
+        hours = np.flatnonzero(counts)
+        return pd.DataFrame({'hour': hours.astype(np.int32), 'Message Count': counts[hours]})
+
+    def daily_counts(self, start_date, end_date, chat_codes=None):
+        days, counts = self.totals(start_date, end_date, chat_codes)['day']
+        return pd.DataFrame({'date_new': pd.to_datetime(days, unit='D'), 'Message Count': counts})
+
+    def active_chat_count(self, start_date, end_date, chat_codes=None):
+        """Distinct chats with at least one message (missing chat_id not counted)."""
+        return self.totals(start_date, end_date, chat_codes)['chats']
+
+    def active_participants(self, start_date, end_date, chat_codes=None):
+        """Exact distinct message senders, from the union of per-shard sender sets."""
+        return self.totals(start_date, end_date, chat_codes)['senders']
+
+    def reaction_counts(self, start_date, end_date, chat_codes=None):
+        """(message codes, reaction counts) of the selected reactions."""
+        return self.totals(start_date, end_date, chat_codes)['reactions']
+
+    def add_leave_counts(self, kind, start_date, end_date, chat_codes=None, name='count'):
+        """Add/leave events of one type per chat_id."""
+        keys, counts = self.totals(start_date, end_date, chat_codes)['add_leave']
+        type_code = self.types.get_indexer([kind])[0]
+        keep = (keys % len(self.types)) == type_code if type_code >= 0 else np.zeros(len(keys), dtype=bool)
+        return pd.DataFrame({
+            'chat_id': pd.Categorical.from_codes(keys[keep] // len(self.types), dtype=self.chat_dtype),
+            name: counts[keep],
+        })
+
+
+_shard_sets = OrderedDict()
+_shard_sets_lock = threading.Lock()
+# One lock per shard set being written, so a build only blocks callers waiting for that set
+_build_locks = {}
+# Evicted shard sets this process wrote: path -> (finalizer, token). Once no view references
+# a set its finalizer queues (path, token) in _collected, and the next build deletes it.
+_pending_deletes = {}
+_collected = []
+
+
+def get_shard_set(pipeline, workers=None, max_entries=2):
+    """The ShardSet for this pipeline's data, or None when sharded aggregation is off.
+
+    A set evicted from the last max_entries is deleted from disk once it is garbage
+    collected, so views still reading it keep their files. Only directories this process
+    wrote are deleted; sets reused from an earlier write (another server, the precompute
+    CLI) are left in place.
+    """
+    workers = int(os.environ.get(SHARD_WORKERS_ENV) or 0) if workers is None else workers
+    if workers < 1 or pa is None:
+        return None
+    key = (pipeline.key, workers)
+    with _shard_sets_lock:
+        if key in _shard_sets:
+            _shard_sets.move_to_end(key)
+            return _shard_sets[key]
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        with _shard_sets_lock:
+            if key in _shard_sets:
+                return _shard_sets[key]
+        base = os.environ.get(SHARD_DIR_ENV) or DEFAULT_SHARD_DIR
+        # One directory per data and shard count, so workers never map a rewritten layout
+        path = os.path.join(base, f"{pipeline.key}-{workers}")
+        with _shard_sets_lock:
+            _delete_collected()
+            # Wanted again before it was deleted: keep the evicted set's files
+            pending = _pending_deletes.pop(path, None)
+            if pending is not None:
+                pending[0].detach()
+        shard_set = ShardSet.build(path, pipeline['msgs'], pipeline['reactions'], pipeline['add_leave'], workers)
+        shard_set.created = shard_set.created or pending is not None
+        with _shard_sets_lock:
+            _shard_sets[key] = shard_set
+            _build_locks.pop(key, None)
+            while len(_shard_sets) > max_entries:
+                _, evicted = _shard_sets.popitem(last=False)
+                if evicted.created:
+                    token = object()
+                    finalizer = weakref.finalize(evicted, _collected.append, (evicted.path, token))
+                    finalizer.atexit = False
+                    _pending_deletes[evicted.path] = finalizer, token
+        return shard_set
+
+
+def _delete_collected():
+    """Delete the directories of evicted sets that have been garbage collected (lock held)."""
+    while _collected:
+        path, token = _collected.pop()
+        pending = _pending_deletes.get(path)
+        if pending is not None and pending[1] is token:
+            del _pending_deletes[path]
+            shutil.rmtree(path, ignore_errors=True)
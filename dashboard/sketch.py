@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from dashboard.filters import day_number
+
+# 2**12 registers: about 1.6% relative standard error
+DEFAULT_PRECISION = 12
+
+
+def _bit_length(values):
+    """Vectorized int.bit_length() for uint64 arrays."""
+    x = values.copy()
+    length = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= (np.uint64(1) << np.uint64(shift))
+        length[big] += shift
+        x[big] >>= np.uint64(shift)
+    return length + (x > 0)
+
+
+def _hash_values(values):
+    """64-bit hashes of the non-missing values of a Series (and their mask), hashing each distinct value once."""
+    codes, uniques = pd.factorize(values)
+    hashes = pd.util.hash_array(np.asarray(uniques, dtype=object))
+    keep = codes >= 0
+    return hashes[codes[keep]], keep
+
+
+def _alpha(m):
+    return {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+
+
+def estimate_registers(registers):
+    """HyperLogLog cardinality estimate with the small-range (linear counting) correction."""
+    m = len(registers)
+    raw = _alpha(m) * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * m and zeros:
+        return m * np.log(m / zeros)
+    return raw
+
+
+class SparseHLL:
+    """HyperLogLog sketches of one value column per (chat, day), stored sparsely.
+
+    Each (chat, day, register) keeps only its max rank, sorted by day, so any date range
+    and chat selection merges by slicing and taking per-register maxima.
+    """
+
+    def __init__(self, chat_codes, days, values, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.m = 1 << precision
+        hashes, keep = _hash_values(values)
+        register = (hashes >> np.uint64(64 - precision)).astype(np.int32)
+        rest = hashes & np.uint64((1 << (64 - precision)) - 1)
+        rank = (64 - precision - _bit_length(rest) + 1).astype(np.int8)
+
+        entries = pd.DataFrame({
+            'chat': np.asarray(chat_codes)[keep],
+            'day': np.asarray(days)[keep],
+            'register': register,
+            'rank': rank,
+        })
+        entries = entries.groupby(['day', 'chat', 'register'], sort=True)['rank'].max().reset_index()
+        self.days = entries['day'].to_numpy()
+        self.chats = entries['chat'].to_numpy()
+        self.registers = entries['register'].to_numpy()
+        self.ranks = entries['rank'].to_numpy()
+
+    @property
+    def relative_error(self):
+        """Relative standard error of an estimate."""
+        return 1.04 / np.sqrt(self.m)
+
+    def __len__(self):
+        return len(self.days)
+
+    def estimate(self, start_day=None, end_day=None, chat_codes=None):
+        lo = 0 if start_day is None else np.searchsorted(self.days, start_day, side='left')
+        hi = len(self.days) if end_day is None else np.searchsorted(self.days, end_day, side='right')
+        registers, ranks = self.registers[lo:hi], self.ranks[lo:hi]
+        if chat_codes is not None:
+            keep = np.isin(self.chats[lo:hi], chat_codes)
+            registers, ranks = registers[keep], ranks[keep]
+        if len(registers) == 0:
+            return 0
+        merged = np.zeros(self.m, dtype=np.int8)
+        np.maximum.at(merged, registers, ranks)
+        return int(round(estimate_registers(merged)))
+
+
+class ParticipantSketches:
+    """Distinct-count sketches for the overview cards.
+
+    active: message senders per (chat, day); members: member phones per chat.
+    """
+
+    def __init__(self, msgs, members, precision=DEFAULT_PRECISION):
+        days = msgs['day'].to_numpy()
+        valid = days >= 0
+        self.active = SparseHLL(
+            msgs['chat_id'].cat.codes.to_numpy()[valid],
+            days[valid],
+            msgs['sender_phone'][valid],
+            precision,
+        )
+        self.members = SparseHLL(
+            members['chat_id'].cat.codes.to_numpy(),
+            np.zeros(len(members), dtype=np.int64),
+            members['contact_phone_number'],
+            precision,
+        )
+
+    @property
+    def relative_error(self):
+        return self.active.relative_error
+
+    def active_participants(self, start_date, end_date, chat_codes=None):
+        return self.active.estimate(
+            None if start_date is None else day_number(start_date),
+            None if end_date is None else day_number(end_date),
+            chat_codes,
+        )
+
+    def unique_members(self, chat_codes):
+        return self.members.estimate(chat_codes=chat_codes)
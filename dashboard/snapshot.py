@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from dashboard.loader import TABLES, default_source, fetch_tables
+from dashboard.timestamps import combine_date_time, parse_datetimes
+
+try:
+    import pyarrow as pa
+except ImportError:  # snapshots are optional, the loader falls back to a full fetch
+    pa = None
+
+# Directory holding the on-disk snapshot; set WA_SNAPSHOT_DIR to an empty string to disable it
+SNAPSHOT_DIR_ENV = 'WA_SNAPSHOT_DIR'
+DEFAULT_SNAPSHOT_DIR = '.cache/snapshot'
+
+# Incremental appends write one Arrow IPC part per table; past this many parts a table is compacted
+MAX_PARTS = 16
+# Seconds a replaced table directory is kept for readers still using the previous meta.json
+RETIRE_SECONDS = 300
+
+
+def _received_at(df):
+    return combine_date_time(df['received_at_date'], df['received_at_time'])
+
+
+def _timestamp(df):
+    return parse_datetimes(df['timestamp'])
+
+
+# Event time of each row of the append-only tabs, used as the refresh watermark. chat and
+# members are always replaced in full: their rows change in place (renamed groups, new
+# booth numbers, removed members) and they are the smallest tabs.
+WATERMARK_PARSERS = {
+    'msgs': _received_at,
+    'reactions': _timestamp,
+    'add_leave': _timestamp,
+}
+
+# Columns identifying a row when rows arrive with a timestamp equal to the watermark;
+# tables not listed are keyed by the whole row
+ROW_KEYS = {
+    'msgs': ['message_id'],
+}
+
+
+class SnapshotStore:
+    """Columnar on-disk copy of the five tabs with a per-table refresh watermark.
+
+    Each table is a directory of uncompressed Arrow IPC files so reads can memory-map
+    them instead of re-parsing CSV; incremental refreshes add a new part per table.
+    meta.json lists the parts and is the only file replaced in place, so a crash or a
+    concurrent reader never sees a half-written table.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.path, 'meta.json')
+
+    def exists(self):
+        return os.path.exists(self.meta_path)
+
+    def meta(self):
+        if not self.exists():
+            return None
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def watermarks(self):
+        meta = self.meta() or {}
+        return {
+            table: pd.Timestamp(value) if value else None
+            for table, value in meta.get('watermarks', {}).items()
+        }
+
+    def boundary_keys(self):
+        """Row keys already stored at each table's watermark."""
+        meta = self.meta() or {}
+        return {table: set(keys) for table, keys in meta.get('boundary_keys', {}).items()}
+
+    def digests(self):
+        """Content digest of each replaced table as last written."""
+        return (self.meta() or {}).get('digests', {})
+
+    def _parts(self, table, meta=None):
+        """Absolute paths of the table's parts as committed in meta.json.
+
+        Snapshots written before parts were recorded list their <table>/ directory.
+        """
+        meta = self.meta() if meta is None else meta
+        if meta and 'parts' in meta:
+            return [os.path.join(self.path, part) for part in meta['parts'].get(table, [])]
+        table_dir = os.path.join(self.path, table)
+        if not os.path.isdir(table_dir):
+            return []
+        return sorted(os.path.join(table_dir, name) for name in os.listdir(table_dir) if name.endswith('.arrow'))
+
+    def _read_arrow(self, table, meta=None):
+        parts = [pa.ipc.open_file(pa.memory_map(path, 'r')).read_all() for path in self._parts(table, meta)]
+        if len(parts) == 1:
+            return parts[0]
+        return pa.concat_tables(parts, promote_options='permissive')
+
+    def read(self, tables=TABLES):
+        meta = self.meta()
+        return {table: self._read_arrow(table, meta).to_pandas() for table in tables}
+
+    def _write_part(self, table, df, parts):
+        """Write df as a new part and return the table's part list with it.
+
+        parts is the committed list (relative paths); None starts a new sibling directory,
+        so a replaced or compacted table never touches the files readers may be mapping.
+        """
+        if parts:
+            table_dir = os.path.dirname(parts[-1])
+            index = int(os.path.basename(parts[-1])[5:10]) + 1
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            table_dir = os.path.basename(tempfile.mkdtemp(prefix=f"{table}.", dir=self.path))
+            parts, index = [], 0
+        name = os.path.join(table_dir, f"part-{index:05d}.arrow")
+        tmp_path = os.path.join(self.path, name + '.tmp')
+        arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        os.replace(tmp_path, os.path.join(self.path, name))
+        return parts + [name]
+
+    def write(self, frames, replace, watermarks, boundary_keys=None, digests=None):
+        """Write whole frames (replace=True) or append new rows, then record the watermarks.
+
+        boundary_keys are the row keys at each new watermark, for the next refresh, and
+        digests the content digests of replaced tables. New parts only become visible when
+        meta.json, which lists every table's parts, is swapped in; directories no longer
+        listed are deleted RETIRE_SECONDS later, once readers of the old meta are done.
+        """
+        meta = self.meta() or {}
+        parts = {table: [os.path.relpath(path, self.path) for path in self._parts(table, meta)] for table in TABLES}
+        for table, df in frames.items():
+            if not replace and df.empty:
+                continue
+            parts[table] = self._write_part(table, df, None if replace else parts[table])
+            if len(parts[table]) > MAX_PARTS:
+                # Compact into a fresh directory
+                df = self._read_arrow(table, {'parts': parts}).to_pandas()
+                parts[table] = self._write_part(table, df, None)
+        meta['watermarks'] = {
+            **meta.get('watermarks', {}),
+            **{table: value.isoformat() if value is not None else None for table, value in watermarks.items()},
+        }
+        meta['boundary_keys'] = {**meta.get('boundary_keys', {}), **(boundary_keys or {})}
+        meta['digests'] = {**meta.get('digests', {}), **(digests or {})}
+        meta['parts'] = parts
+        meta['tables'] = {table: len(table_parts) for table, table_parts in parts.items()}
+        meta['written_at'] = datetime.now(timezone.utc).isoformat()
+        meta['retired'] = self._retire(meta)
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='meta.', suffix='.tmp', dir=self.path)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def _retire(self, meta):
+        """{directory: retired at} of table directories the new meta no longer lists.
+
+        Directories retired more than RETIRE_SECONDS ago are deleted here, and so are
+        temporary files of that age left by an interrupted write.
+        """
+        now = datetime.now(timezone.utc)
+        live = {os.path.dirname(part) for table_parts in meta['parts'].values() for part in table_parts}
+        retired = {}
+        for name in sorted(os.listdir(self.path)) if os.path.isdir(self.path) else []:
+            path = os.path.join(self.path, name)
+            if name.endswith('.tmp') and now.timestamp() - os.path.getmtime(path) > RETIRE_SECONDS:
+                os.remove(path)
+            if name in live or not os.path.isdir(path):
+                continue
+            retired_at = meta.get('retired', {}).get(name, now.isoformat())
+            if (now - datetime.fromisoformat(retired_at)).total_seconds() > RETIRE_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                retired[name] = retired_at
+        return retired
+
+
+def default_store():
+    if pa is None:
+        return None
+    path = os.environ.get(SNAPSHOT_DIR_ENV, DEFAULT_SNAPSHOT_DIR)
+    return SnapshotStore(path) if path else None
+
+
+def _row_keys(table, df):
+    """A hash per row of its ROW_KEYS columns, or of the whole row."""
+    columns = ROW_KEYS.get(table, list(df.columns))
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _digest(df):
+    """A digest of a table's columns and rows, to tell whether a replaced table changed."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([str(c) for c in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _watermark(table, df, times=None):
+    """(latest event time, keys of the rows at it) for an append-only table."""
+    times = WATERMARK_PARSERS[table](df) if times is None else times
+    latest = times.max() if len(df) else None
+    if latest is None or pd.isna(latest):
+        return None, []
+    return latest, [int(key) for key in _row_keys(table, df[(times == latest).to_numpy()])]
+
+
+def refresh_snapshot(store, source=None, full=False, **fetch_kwargs):
+    """Fetch the tabs and bring the snapshot up to date.
+
+    The published sheet only serves whole tabs, so every refresh downloads the CSVs; the
+    incremental part is that only rows at or after the stored watermark, less those already
+    stored at it, are appended instead of rewriting every table. chat and members are
+    replaced whenever their content changed; full=True rewrites every table, dropping rows
+    removed from the sheet. Returns a stats dict with rows appended per table, the tables
+    replaced and the fetch timings.
+    """
+    frames, timings = fetch_tables(source or default_source(), **fetch_kwargs)
+    stats = {'full': full or not store.exists(), 'appended': {}, 'replaced': {}, 'timings': timings}
+    if stats['full']:
+        marks = {table: _watermark(table, df) for table, df in frames.items() if table in WATERMARK_PARSERS}
+        store.write(frames, replace=True, watermarks={table: mark[0] for table, mark in marks.items()},
+                    boundary_keys={table: mark[1] for table, mark in marks.items()},
+                    digests={table: _digest(df) for table, df in frames.items() if table not in WATERMARK_PARSERS})
+        stats['appended'] = {table: len(df) for table, df in frames.items() if table in WATERMARK_PARSERS}
+        stats['replaced'] = {table: len(df) for table, df in frames.items() if table not in WATERMARK_PARSERS}
+        return stats
+
+    previous = store.watermarks()
+    stored_keys = store.boundary_keys()
+    new_rows, watermarks, boundary_keys = {}, {}, {}
+    for table, df in frames.items():
+        if table not in WATERMARK_PARSERS:
+            continue
+        times = WATERMARK_PARSERS[table](df)
+        watermark = previous.get(table)
+        if watermark is None:
+            # no usable watermark yet, nothing to compare against
+            new_rows[table] = df
+        elif table not in stored_keys:
+            # written before boundary keys were recorded
+            new_rows[table] = df[(times > watermark).to_numpy()]
+        else:
+            # Rows at the watermark's second may have arrived after the last refresh
+            new = (times >= watermark).to_numpy(dtype=bool, copy=True)
+            at_mark = new & (times == watermark).to_numpy()
+            if at_mark.any():
+                new[at_mark] = ~pd.Series(_row_keys(table, df[at_mark])).isin(stored_keys[table]).to_numpy()
+            new_rows[table] = df[new]
+        latest, keys = _watermark(table, df, times)
+        if latest is None:
+            watermarks[table] = watermark
+        else:
+            watermarks[table], boundary_keys[table] = latest, keys
+
+    stored_digests = store.digests()
+    for table in TABLES:
+        if table not in WATERMARK_PARSERS:
+            digest = _digest(frames[table])
+            if digest != stored_digests.get(table):
+                store.write({table: frames[table]}, replace=True, watermarks={}, digests={table: digest})
+                stats['replaced'][table] = len(frames[table])
+    store.write(new_rows, replace=False, watermarks=watermarks, boundary_keys=boundary_keys)
+    stats['appended'] = {table: len(df) for table, df in new_rows.items()}
+    return stats
+
+
+def load_tables(source=None, store=None):
+    """Return {table: frame}, memory-mapping the snapshot when one exists.
+
+    Without a snapshot the tabs are fetched once and, if a store is configured, written
+    as the initial snapshot.
+    """
+    if store is None:
+        frames, _ = fetch_tables(source or default_source())
+        return frames
+    if not store.exists():
+        refresh_snapshot(store, source, full=True)
+    return store.read()
+
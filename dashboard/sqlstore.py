@@ -0,0 +1,512 @@
+"""Out-of-core query mode: the five tabs in an indexed SQLite database.
+
+    python -m dashboard.sqlstore --db .cache/dashboard.sqlite
+    WA_SQLITE_PATH=.cache/dashboard.sqlite streamlit run whatsapp_app.py
+
+Ingestion streams each tab in chunks through the same preprocessing stages as the
+in-memory pipeline. In this mode every panel runs as SQL with the date range, group and
+booth pushed down, and only aggregated rows come back into pandas.
+"""
+import argparse
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from dashboard.classify import classify_groups
+from dashboard.filters import day_number
+from dashboard.loader import TABLES, default_source, fetch_bytes
+from dashboard.panels import MESSAGE_COLUMNS, MIMETYPE_LABELS, FilterSpec
+from dashboard.pipeline import STAGES
+from dashboard.poc import EXTRA_METRICS, POC_COLUMNS, assemble_poc_summary
+from dashboard.schema import clean_labels
+from dashboard.tables import PAGE_SIZE, TablePage, page_bounds
+
+# Path of the SQLite database; when set the dashboard queries it instead of loading the tabs
+SQLITE_PATH_ENV = 'WA_SQLITE_PATH'
+
+CHUNK_ROWS = 200_000
+
+# Identifier columns are read as text so chunks agree on their type
+ID_COLUMNS = ['chat_id', 'message_id', 'sender_phone', 'contact_phone_number', 'sender_id']
+
+# Days are days since the epoch, like dashboard.filters.day_numbers
+SCHEMA = {
+    'chat': 'chat_id TEXT, chat_name TEXT, booth_number TEXT, chat_type TEXT, created_day INTEGER',
+    'members': 'chat_id TEXT, phone TEXT, is_admin INTEGER',
+    'msgs': 'message_id TEXT, chat_id TEXT, sender_phone TEXT, day INTEGER, hour INTEGER, mimetype TEXT, message_body TEXT',
+    'reactions': 'message_id TEXT, chat_id TEXT, sender_id TEXT, day INTEGER',
+    'add_leave': 'chat_id TEXT, type TEXT, day INTEGER',
+}
+INDEXES = {
+    'chat': [('created_day',), ('chat_name',), ('booth_number',)],
+    'members': [('chat_id',), ('phone',)],
+    'msgs': [('day', 'chat_id', 'hour', 'mimetype'), ('chat_id', 'day'), ('message_id',), ('sender_phone', 'day')],
+    'reactions': [('day', 'chat_id'), ('chat_id', 'day'), ('message_id',)],
+    'add_leave': [('day', 'chat_id'), ('chat_id', 'day')],
+}
+
+
+def _nullable(values):
+    # The parsed tables mark a missing day/hour as -1; SQLite stores NULL
+    return values.astype('Int64').where(values >= 0)
+
+
+def _phones(values):
+    # Same display cleaning as the shared phone categories of the in-memory pipeline
+    cleaned = pd.Series(values, dtype=object)
+    present = cleaned.notna()
+    cleaned[present] = clean_labels(cleaned[present]).to_numpy()
+    return cleaned
+
+
+def _stage(name, *args):
+    func, _ = STAGES[name]
+    return func(*args)
+
+
+def prepare_chunk(table, chunk, stats):
+    """One raw CSV chunk as rows of the table's SCHEMA columns."""
+    if table == 'chat':
+        chat = _stage('parsed_chat', chunk)
+        return pd.DataFrame({
+            'chat_id': chat['chat_id'],
+            'chat_name': chat['chat_name'],
+            'booth_number': chat['booth_number'],
+            'chat_type': chat['chat_type'],
+            'created_day': _nullable(chat['day']),
+        })
+    if table == 'members':
+        return pd.DataFrame({
+            'chat_id': chunk['chat_id'],
+            'phone': _phones(chunk['contact_phone_number']),
+            'is_admin': (chunk['contact_is_admin'] == True).astype(int),
+        })
+    if table == 'msgs':
+        media = _stage('media', chunk)
+        stats['malformed_media'] += media[1]['malformed']
+        msgs = _stage('parsed_msgs', chunk, media)
+        return pd.DataFrame({
+            'message_id': msgs['message_id'],
+            'chat_id': msgs['chat_id'],
+            'sender_phone': _phones(msgs['sender_phone']),
+            'day': _nullable(msgs['day']),
+            'hour': _nullable(msgs['hour']),
+            'mimetype': msgs['mimetype'],
+            'message_body': msgs['message_body'],
+        })
+    parsed = _stage(f"parsed_{table}", chunk)
+    if table == 'reactions':
+        return pd.DataFrame({
+            'message_id': parsed['message_id'],
+            'chat_id': parsed['chat_id'],
+            'sender_id': _phones(parsed['sender_id']),
+            'day': _nullable(parsed['day']),
+        })
+    return pd.DataFrame({
+        'chat_id': parsed['chat_id'],
+        'type': parsed['type'],
+        'day': _nullable(parsed['day']),
+    })
+
+
+class SqlStore:
+    """The prepared tabs in one SQLite file, queried read-only by the dashboard."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def connect(self):
+        # One connection per query: Streamlit runs sessions on separate threads
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def query(self, sql, params=None):
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def meta(self):
+        if not self.exists():
+            return {}
+        return dict(self.query('SELECT key, value FROM meta').itertuples(index=False))
+
+    def ingest(self, source=None, tables=TABLES, chunk_rows=CHUNK_ROWS, timeout=30, retries=3, backoff=1.0):
+        """Rebuild the database from the source in chunks and swap it in; returns stats.
+
+        Each tab is downloaded with the loader's timeout and retries, then parsed and
+        inserted chunk by chunk. The new database is built in its own temporary file
+        next to the target, so concurrent ingests never write to the same file.
+        """
+        source = source or default_source()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix='.tmp', dir=directory or None)
+        os.close(fd)
+        try:
+            stats = self._ingest(tmp_path, source, tables, chunk_rows, timeout, retries, backoff)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return stats
+
+    def _ingest(self, tmp_path, source, tables, chunk_rows, timeout, retries, backoff):
+        stats = {'rows': {}, 'malformed_media': 0}
+        digest = hashlib.blake2b(digest_size=16)
+        start = time.perf_counter()
+        with closing(sqlite3.connect(tmp_path)) as conn:
+            conn.execute('PRAGMA journal_mode = OFF')
+            conn.execute('PRAGMA synchronous = OFF')
+            for table in tables:
+                conn.execute(f"CREATE TABLE {table} ({SCHEMA[table]})")
+                stats['rows'][table] = 0
+                raw, _, _ = fetch_bytes(source, table, timeout, retries, backoff)
+                chunks = pd.read_csv(io.BytesIO(raw), chunksize=chunk_rows, dtype={c: str for c in ID_COLUMNS})
+                for chunk in chunks:
+                    digest.update(pd.util.hash_pandas_object(chunk, index=False).values.tobytes())
+                    rows = prepare_chunk(table, chunk, stats)
+                    rows.to_sql(table, conn, if_exists='append', index=False)
+                    stats['rows'][table] += len(rows)
+                # Indexes are built after the bulk insert, which is much faster than maintaining them
+                for columns in INDEXES[table]:
+                    conn.execute(f"CREATE INDEX {table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})")
+            conn.execute('ANALYZE')
+            meta = {
+                'data_key': digest.hexdigest(),
+                'ingested_at': datetime.now(timezone.utc).isoformat(),
+                'malformed_media': str(stats['malformed_media']),
+                **{f"rows_{table}": str(rows) for table, rows in stats['rows'].items()},
+            }
+            conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            conn.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+            conn.commit()
+        stats['seconds'] = time.perf_counter() - start
+        return stats
+
+    def date_bounds(self):
+        """(min, max) date across chat, msgs, reactions and add_leave; today when empty."""
+        bounds = self.query(
+            'SELECT MIN(lo) AS lo, MAX(hi) AS hi FROM ('
+            ' SELECT MIN(created_day) AS lo, MAX(created_day) AS hi FROM chat'
+            ' UNION ALL SELECT MIN(day), MAX(day) FROM msgs'
+            ' UNION ALL SELECT MIN(day), MAX(day) FROM reactions'
+            ' UNION ALL SELECT MIN(day), MAX(day) FROM add_leave)'
+        ).iloc[0]
+        if pd.isna(bounds['lo']):
+            today = datetime.now().date()
+            return today, today
+        epoch = pd.Timestamp(0)
+        return tuple((epoch + pd.Timedelta(days=int(bounds[side]))).date() for side in ('lo', 'hi'))
+
+    def chats(self, start_date=None, end_date=None, group=None, booth=None):
+        """Chat rows created in the date range, optionally narrowed to a group and booth."""
+        view = SqlView(self, FilterSpec(start_date, end_date, group, booth))
+        return self.query(f"{view.chat_cte} SELECT chat_id, chat_name, booth_number FROM sel_chat ORDER BY row", view.params)
+
+
+class SqlView:
+    """One filter selection as SQL: a sel_chat CTE plus event-table conditions."""
+
+    def __init__(self, store, spec):
+        self.store = store
+        self.spec = FilterSpec(*spec)
+        self.params = {}
+        if self.spec.start_date is not None:
+            self.params['start'] = day_number(self.spec.start_date)
+        if self.spec.end_date is not None:
+            self.params['end'] = day_number(self.spec.end_date)
+        chat_conditions = self._day_conditions('created_day')
+        if self.spec.group is not None:
+            self.params['group'] = self.spec.group
+            chat_conditions.append('chat_name = :group')
+        if self.spec.booth is not None:
+            self.params['booth'] = str(self.spec.booth)
+            chat_conditions.append('booth_number = :booth')
+        where = f" WHERE {' AND '.join(chat_conditions)}" if chat_conditions else ''
+        self.chat_cte = f"WITH sel_chat AS (SELECT rowid AS row, chat_id, chat_name, booth_number FROM chat{where})"
+
+    def _day_conditions(self, column):
+        conditions = []
+        if 'start' in self.params:
+            conditions.append(f"{column} >= :start")
+        if 'end' in self.params:
+            conditions.append(f"{column} <= :end")
+        return conditions
+
+    def events(self, alias):
+        """WHERE conditions for msgs, reactions or add_leave rows under this selection.
+
+        Like the in-memory filter, events follow the selected chats only once a group or
+        booth is chosen.
+        """
+        conditions = self._day_conditions(f"{alias}.day")
+        if self.spec.group is not None or self.spec.booth is not None:
+            conditions.append(f"{alias}.chat_id IN (SELECT chat_id FROM sel_chat)")
+        return ' AND '.join(conditions) or '1'
+
+    def query(self, sql, params=None):
+        return self.store.query(f"{self.chat_cte} {sql}", {**self.params, **(params or {})})
+
+    def inputs(self, name):
+        # nothing is loaded into pandas; rows in are not tracked in this mode
+        return ()
+
+
+# name -> function(view), mirroring dashboard.panels.PANELS
+SQL_PANELS = {}
+
+
+def sql_panel(name):
+    def register(func):
+        SQL_PANELS[name] = func
+        return func
+    return register
+
+
+def compute(name, view, **options):
+    return SQL_PANELS[name](view, **options)
+
+
+@sql_panel('overview')
+def overview(view, exact=True):
+    # Distinct counts are always exact here
+    counts = view.query(
+        'SELECT'
+        ' (SELECT COUNT(DISTINCT chat_id) FROM sel_chat) AS total_groups,'
+        ' (SELECT COUNT(phone) FROM members WHERE chat_id IN (SELECT chat_id FROM sel_chat)) AS total_participants,'
+        ' (SELECT COUNT(DISTINCT phone) FROM members WHERE chat_id IN (SELECT chat_id FROM sel_chat)) AS unique_participants,'
+        f" (SELECT COUNT(DISTINCT sender_phone) FROM msgs m WHERE {view.events('m')}) AS active_participants,"
+        f" (SELECT COUNT(DISTINCT chat_id) FROM msgs m WHERE {view.events('m')}) AS groups_with_msgs"
+    ).iloc[0]
+    total_groups, total_participants = int(counts['total_groups']), int(counts['total_participants'])
+    return {
+        'total_groups': total_groups,
+        'total_participants': total_participants,
+        'unique_participants': int(counts['unique_participants']),
+        'percent_active': counts['active_participants'] / total_participants * 100 if total_participants > 0 else 0,
+        'percent_active_groups': counts['groups_with_msgs'] / total_groups * 100 if total_groups > 0 else 0,
+        'estimated': False,
+    }
+
+
+@sql_panel('group_types')
+def group_type_counts(view):
+    sizes = view.query(
+        'SELECT chat_id, COUNT(DISTINCT phone) AS count,'
+        ' COUNT(DISTINCT CASE WHEN is_admin = 1 THEN phone END) AS admin_count'
+        ' FROM members WHERE chat_id IN (SELECT chat_id FROM sel_chat) GROUP BY chat_id'
+    )
+    types = pd.Series(classify_groups(sizes[['chat_id', 'count']], sizes.set_index('chat_id')['admin_count']), name='type')
+    counts = types.value_counts().reset_index()
+    counts.columns = ['Group Type', 'Count']
+    return counts
+
+
+@sql_panel('message_types')
+def message_type_counts(view):
+    counts = view.query(
+        'SELECT mimetype AS "Msg Type", COUNT(*) AS "Count" FROM msgs m'
+        f" WHERE {view.events('m')} AND mimetype IS NOT NULL"
+        ' GROUP BY mimetype ORDER BY "Count" DESC'
+    )
+    counts['Msg Type'] = counts['Msg Type'].replace(MIMETYPE_LABELS)
+    return counts
+
+
+@sql_panel('reaction_types')
+def reaction_type_counts(view):
+    present = view.query(
+        f"SELECT EXISTS (SELECT 1 FROM msgs m WHERE {view.events('m')}) AS msgs,"
+        f" EXISTS (SELECT 1 FROM reactions r WHERE {view.events('r')}) AS reactions"
+    ).iloc[0]
+    if not present['msgs'] or not present['reactions']:
+        return None
+    counts = view.query(
+        f", reacted AS (SELECT message_id, COUNT(*) AS n FROM reactions r WHERE {view.events('r')} GROUP BY message_id)"
+        ' SELECT m.mimetype AS "Msg Type", SUM(reacted.n) AS "Reaction Count"'
+        f" FROM msgs m JOIN reacted ON reacted.message_id = m.message_id"
+        f" WHERE {view.events('m')} AND m.mimetype IS NOT NULL"
+        ' GROUP BY m.mimetype ORDER BY "Reaction Count" DESC'
+    )
+    counts['Msg Type'] = counts['Msg Type'].replace(MIMETYPE_LABELS)
+    return counts
+
+
+@sql_panel('top_reacted')
+def top_reacted_messages(view, k=5):
+    # Counts are multiplied by how many selected msgs rows share the message_id, as a join
+    # of the two tables would; body and type come from the first of those rows. Ties are
+    # broken by message_id.
+    return view.query(
+        f", reacted AS (SELECT message_id, COUNT(*) AS n FROM reactions r WHERE {view.events('r')} GROUP BY message_id),"
+        ' sent AS (SELECT message_id, COUNT(*) AS copies, MIN(m.rowid) AS first_row'
+        f"  FROM msgs m WHERE {view.events('m')} AND message_id IN (SELECT message_id FROM reacted) GROUP BY message_id)"
+        ' SELECT m.message_body AS "Message", m.mimetype AS "Msg Type", reacted.n * sent.copies AS "No. of Reactions"'
+        ' FROM reacted JOIN sent ON sent.message_id = reacted.message_id JOIN msgs m ON m.rowid = sent.first_row'
+        ' WHERE m.message_body IS NOT NULL AND m.mimetype IS NOT NULL'
+        f" ORDER BY \"No. of Reactions\" DESC, reacted.message_id LIMIT {int(k)}"
+    )
+
+
+@sql_panel('add_leave')
+def add_leave_summary(view):
+    """Participants added and left per group, for groups with at least one of either."""
+    return view.query(
+        ', groups AS (SELECT chat_id, chat_name, booth_number, MIN(row) AS first_row'
+        '  FROM sel_chat GROUP BY chat_id, chat_name, booth_number),'
+        " events AS (SELECT chat_id, SUM(type = 'add') AS added, SUM(type = 'leave') AS left_"
+        f"  FROM add_leave a WHERE {view.events('a')} GROUP BY chat_id)"
+        ' SELECT g.chat_name AS "Group Name", g.booth_number AS "Booth Number",'
+        ' COALESCE(e.added, 0) AS "Participants Added", COALESCE(e.left_, 0) AS "Participants Left"'
+        ' FROM groups g LEFT JOIN events e ON e.chat_id = g.chat_id'
+        ' WHERE COALESCE(e.added, 0) >= 1 OR COALESCE(e.left_, 0) >= 1'
+        ' ORDER BY g.first_row'
+    )
+
+
+@sql_panel('poc')
+def poc_analysis(view, extra_metrics=EXTRA_METRICS):
+    """POC metrics aggregated in SQL per admin phone, assembled like poc_summary."""
+    admins_cte = (
+        ', admins AS (SELECT rowid AS row, phone, chat_id FROM members'
+        ' WHERE chat_id IN (SELECT chat_id FROM sel_chat) AND is_admin = 1 AND phone IS NOT NULL)'
+    )
+    pocs = view.query(
+        f"{admins_cte} SELECT phone, COUNT(DISTINCT chat_id) AS admin_of FROM admins GROUP BY phone ORDER BY MIN(row)"
+    )
+    summary = pd.DataFrame({'POC Phone Number': pocs['phone'].to_numpy()})
+    if summary.empty:
+        return summary.reindex(columns=POC_COLUMNS + list(extra_metrics))
+
+    poc_msgs = f"msgs m WHERE {view.events('m')} AND m.sender_phone IN (SELECT phone FROM admins)"
+    by_sender = view.query(
+        f"{admins_cte} SELECT sender_phone, COUNT(DISTINCT chat_id) AS active_groups, COUNT(*) AS total_messages,"
+        f" MAX(day) AS last_day FROM {poc_msgs} GROUP BY sender_phone"
+    ).set_index('sender_phone')
+    by_sender['last_active'] = (pd.Timestamp(0) + pd.to_timedelta(by_sender.pop('last_day'), unit='D')).dt.date
+
+    received = None
+    if 'Reactions Received' in extra_metrics:
+        # Attribute each reaction to the sender of the first selected message with its message_id
+        received = view.query(
+            f"{admins_cte}, senders AS (SELECT message_id, sender_phone FROM msgs WHERE rowid IN"
+            f"  (SELECT MIN(m.rowid) FROM {poc_msgs} GROUP BY m.message_id))"
+            ' SELECT s.sender_phone, COUNT(*) AS n FROM reactions r JOIN senders s ON s.message_id = r.message_id'
+            f" WHERE {view.events('r')} GROUP BY s.sender_phone"
+        ).set_index('sender_phone')['n']
+    return assemble_poc_summary(summary, pocs.set_index('phone')['admin_of'], by_sender, received, extra_metrics)
+
+
+@sql_panel('hourly')
+def hourly_trend(view):
+    trend = view.query(
+        'SELECT hour, COUNT(*) AS "Message Count" FROM msgs m'
+        f" WHERE {view.events('m')} AND hour IS NOT NULL GROUP BY hour ORDER BY hour"
+    )
+    trend['hour_label'] = np.char.mod('%02d:00', trend['hour'].to_numpy())
+    return trend
+
+
+@sql_panel('daily')
+def daily_trend(view):
+    trend = view.query(
+        f"SELECT day, COUNT(*) AS \"Message Count\" FROM msgs m WHERE {view.events('m')} AND day IS NOT NULL"
+        ' GROUP BY day ORDER BY day'
+    )
+    trend.insert(0, 'date_new', pd.to_datetime(trend.pop('day'), unit='D'))
+    return trend
+
+
+# Message drill-down column -> the expression it sorts by
+MESSAGE_SORT = {
+    'Date': 'm.day',
+    'Hour': 'm.hour',
+    'Group Name': 'n.chat_name',
+    'Sender': 'm.sender_phone',
+    'Msg Type': 'm.mimetype',
+    'Message': 'm.message_body',
+}
+MESSAGE_SEARCH = ['n.chat_name', 'm.sender_phone', 'm.mimetype', 'm.message_body']
+
+
+class SqlMessageTable:
+    """The message drill-down as SQL: each page is one COUNT and one LIMIT/OFFSET query."""
+
+    columns = MESSAGE_COLUMNS
+
+    def __init__(self, view, sender=None, group=None, booth=None):
+        self.view = view
+        self.params = {}
+        conditions = [view.events('m')]
+        if sender is not None:
+            self.params['sender'] = sender
+            conditions.append('m.sender_phone = :sender')
+        if group is not None:
+            self.params.update(drill_group=group, drill_booth=booth)
+            conditions.append(
+                'm.chat_id IN (SELECT chat_id FROM chat WHERE chat_name = :drill_group AND booth_number IS :drill_booth'
+                f" AND {' AND '.join(view._day_conditions('created_day')) or '1'})"
+            )
+        self.where = ' AND '.join(conditions)
+
+    def page(self, page=0, page_size=PAGE_SIZE, sort=None, descending=False, search=''):
+        # Group names come from the first chat row per chat_id, as in memory
+        source = (
+            ', names AS (SELECT chat_id, chat_name FROM chat WHERE rowid IN (SELECT MIN(rowid) FROM chat GROUP BY chat_id))'
+            ' SELECT {columns} FROM msgs m LEFT JOIN names n ON n.chat_id = m.chat_id WHERE {where}'
+        )
+        where, params = self.where, dict(self.params)
+        if search:
+            params['search'] = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            matches = ' OR '.join(f"{column} LIKE :search ESCAPE '\\'" for column in MESSAGE_SEARCH)
+            where += f" AND ({matches})"
+        total = int(self.view.query(source.format(columns='COUNT(*) AS n', where=where), params).iloc[0]['n'])
+        page, pages, start = page_bounds(total, page, page_size)
+        order = f"{MESSAGE_SORT[sort]} {'DESC' if descending else 'ASC'} NULLS LAST, " if sort else ''
+        rows = self.view.query(
+            source.format(
+                columns='m.day, m.hour AS "Hour", n.chat_name AS "Group Name", m.sender_phone AS "Sender",'
+                        ' m.mimetype AS "Msg Type", m.message_body AS "Message"',
+                where=where,
+            ) + f" ORDER BY {order}m.day DESC, m.hour DESC, m.rowid DESC LIMIT :limit OFFSET :offset",
+            {**params, 'limit': int(page_size), 'offset': start},
+        )
+        rows.insert(0, 'Date', pd.to_datetime(rows.pop('day'), unit='D'))
+        rows['Hour'] = rows['Hour'].astype('Int8')
+        rows['Msg Type'] = rows['Msg Type'].replace(MIMETYPE_LABELS)
+        return TablePage(rows, total, page, pages)
+
+
+def message_table(view, sender=None, group=None, booth=None):
+    """Selected messages of one POC or group, like dashboard.panels.message_table."""
+    return SqlMessageTable(view, sender, group, booth)
+
+
+def default_sql_store():
+    path = os.environ.get(SQLITE_PATH_ENV)
+    return SqlStore(path) if path else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=os.environ.get(SQLITE_PATH_ENV), help=f"database path (default: ${SQLITE_PATH_ENV})")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+    if not args.db:
+        parser.error(f"pass --db or set {SQLITE_PATH_ENV}")
+    stats = SqlStore(args.db).ingest(chunk_rows=args.chunk_rows)
+    print(', '.join(f"{table}: {rows}" for table, rows in stats['rows'].items()) + f" in {stats['seconds']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
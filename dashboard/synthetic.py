@@ -0,0 +1,164 @@
+"""Seeded synthetic copies of the five sheet tabs, for offline benchmarking.
+
+    python -m dashboard.synthetic --out data/synthetic --messages 1000000
+
+The files match the published sheet's CSV schemas and can be read with
+WA_DATA_DIR=data/synthetic or dashboard.loader.LocalSource.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+MIMETYPES = np.array(['image/jpeg', 'video/mp4', 'audio/mpeg', 'application/pdf', 'image/webp'])
+MEDIA_SHARE = 0.3
+MALFORMED_MEDIA_SHARE = 0.0005
+START = pd.Timestamp('2024-01-01')
+
+# msgs and reactions are written in chunks of this many rows to bound memory at 10M messages
+CHUNK_ROWS = 500_000
+
+
+def _phones(ids):
+    return np.char.add(np.char.add('91', (9000000000 + ids).astype(str)), '@c.us')
+
+
+def _timestamps(rng, n, days):
+    return START + pd.to_timedelta(rng.integers(0, days * 86400, n), unit='s')
+
+
+def make_chat(rng, n_chats, days):
+    n_private = max(1, n_chats // 20)
+    group_ids = np.char.add((120363000000000000 + np.arange(n_chats)).astype(str), '@g.us')
+    private_ids = _phones(np.arange(n_private))
+    booths = rng.integers(1, max(2, n_chats // 3), n_chats).astype(str)
+    names = np.char.add('Booth Group ', booths).astype(object)
+    # A few rows the dashboard drops: '#ERROR!' names, empty names, names without a booth number
+    bad = rng.random(n_chats)
+    names[bad < 0.01] = '#ERROR!'
+    names[(bad >= 0.01) & (bad < 0.015)] = ''
+    names[(bad >= 0.015) & (bad < 0.02)] = 'Booth Group'
+    created = _timestamps(rng, n_chats + n_private, days)
+    return pd.DataFrame({
+        'chat_id': np.concatenate([group_ids, private_ids]),
+        'chat_name': np.concatenate([names, np.full(n_private, 'Private chat', dtype=object)]),
+        'chat_created_at': created.strftime('%d/%m/%Y %H:%M:%S'),
+    })
+
+
+def make_members(rng, chat_ids, n_phones, mean_size):
+    sizes = np.maximum(1, rng.poisson(mean_size, len(chat_ids)))
+    chat = np.repeat(chat_ids, sizes)
+    phone = rng.integers(0, n_phones, len(chat))
+    # The first member of most groups is its admin
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    is_admin = np.zeros(len(chat), dtype=bool)
+    is_admin[starts] = rng.random(len(starts)) < 0.85
+    members = pd.DataFrame({
+        'chat_id': chat,
+        'contact_phone_number': _phones(phone),
+        'contact_is_admin': is_admin,
+    })
+    return members.drop_duplicates(['chat_id', 'contact_phone_number'])
+
+
+def _media(rng, n):
+    media = pd.Series(np.full(n, np.nan, dtype=object))
+    has_media = rng.random(n) < MEDIA_SHARE
+    k = int(has_media.sum())
+    mimetype = pd.Series(rng.choice(MIMETYPES, k))
+    size = pd.Series(rng.integers(1_000, 16_000_000, k).astype(str))
+    seconds = pd.Series(rng.integers(1, 600, k).astype(str))
+    payload = '{"mimetype": "' + mimetype + '", "file_size": ' + size + ', "seconds": ' + seconds + '}'
+    media[has_media] = payload.to_numpy()
+    malformed = rng.random(n) < MALFORMED_MEDIA_SHARE
+    media[malformed] = '{"mimetype": "image/jpeg", '
+    return media
+
+
+def make_msgs(rng, start_id, n, chat_ids, chat_weights, n_phones, days):
+    ts = _timestamps(rng, n, days)
+    ids = np.arange(start_id, start_id + n)
+    return pd.DataFrame({
+        'message_id': np.char.add('false_', ids.astype(str)),
+        'chat_id': rng.choice(chat_ids, n, p=chat_weights),
+        'sender_phone': _phones(rng.integers(0, n_phones, n)),
+        'received_at_date': ts.strftime('%Y-%m-%d'),
+        'received_at_time': ts.strftime('%H:%M:%S'),
+        'media': _media(rng, n),
+        'message_body': np.char.add('message text ', (ids % 50_000).astype(str)),
+    })
+
+
+def make_reactions(rng, msgs, share, n_phones):
+    # Reactions concentrate on a few popular messages (Zipf-like)
+    n = int(len(msgs) * share)
+    picks = np.minimum(rng.zipf(1.3, n) - 1, len(msgs) - 1)
+    picks = rng.permutation(len(msgs))[picks]
+    reacted = msgs.iloc[picks]
+    ts = pd.to_datetime(reacted['received_at_date'] + ' ' + reacted['received_at_time'])
+    ts = ts + pd.to_timedelta(rng.integers(0, 6 * 3600, n), unit='s')
+    return pd.DataFrame({
+        'message_id': reacted['message_id'].to_numpy(),
+        'chat_id': reacted['chat_id'].to_numpy(),
+        'sender_id': _phones(rng.integers(0, n_phones, n)),
+        'timestamp': ts.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(),
+    })
+
+
+def make_add_leave(rng, chat_ids, n, days):
+    return pd.DataFrame({
+        'chat_id': rng.choice(chat_ids, n),
+        'type': rng.choice(['add', 'leave'], n, p=[0.7, 0.3]),
+        'timestamp': _timestamps(rng, n, days).strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+def generate(out, messages=100_000, chats=None, phones=None, days=365, reaction_share=0.3, seed=0):
+    """Write chat/members/msgs/reactions/add_leave CSVs under out; returns row counts."""
+    rng = np.random.default_rng(seed)
+    chats = chats or max(20, messages // 2_000)
+    phones = phones or max(100, messages // 20)
+    os.makedirs(out, exist_ok=True)
+
+    chat = make_chat(rng, chats, days)
+    chat.to_csv(os.path.join(out, 'chat.csv'), index=False)
+    chat_ids = chat['chat_id'].to_numpy()
+    members = make_members(rng, chat_ids[:chats], phones, mean_size=25)
+    members.to_csv(os.path.join(out, 'members.csv'), index=False)
+    add_leave = make_add_leave(rng, chat_ids, max(10, messages // 100), days)
+    add_leave.to_csv(os.path.join(out, 'add_leave.csv'), index=False)
+
+    # Busy groups get most of the traffic
+    weights = rng.pareto(1.5, len(chat_ids)) + 1
+    weights /= weights.sum()
+    counts = {'chat': len(chat), 'members': len(members), 'add_leave': len(add_leave), 'msgs': 0, 'reactions': 0}
+    for start in range(0, messages, CHUNK_ROWS):
+        n = min(CHUNK_ROWS, messages - start)
+        msgs = make_msgs(rng, start, n, chat_ids, weights, phones, days)
+        reactions = make_reactions(rng, msgs, reaction_share, phones)
+        first = start == 0
+        msgs.to_csv(os.path.join(out, 'msgs.csv'), index=False, mode='w' if first else 'a', header=first)
+        reactions.to_csv(os.path.join(out, 'reactions.csv'), index=False, mode='w' if first else 'a', header=first)
+        counts['msgs'] += len(msgs)
+        counts['reactions'] += len(reactions)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', required=True, help='directory to write <table>.csv files to')
+    parser.add_argument('--messages', type=int, default=100_000)
+    parser.add_argument('--chats', type=int, default=None, help='default: one per 2,000 messages')
+    parser.add_argument('--phones', type=int, default=None, help='default: one per 20 messages')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--reaction-share', type=float, default=0.3, help='reactions per message')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    counts = generate(args.out, args.messages, args.chats, args.phones, args.days, args.reaction_share, args.seed)
+    print(', '.join(f"{table}: {rows}" for table, rows in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
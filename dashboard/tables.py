@@ -0,0 +1,69 @@
+"""Server-side paging, sorting and search for the dashboard's tables.
+
+A table result stays on the server and the app asks it for one page at a time, so only
+the visible rows are sent to the browser. Sort orders and the lowercased search text are
+computed once per table and reused for every page, sort and search over it.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZE = 25
+PAGE_SIZES = [25, 50, 100]
+
+# rows of one page, matching rows in total, page index (from 0) and page count
+TablePage = namedtuple('TablePage', ['rows', 'total', 'page', 'pages'])
+
+
+def page_bounds(total, page, page_size):
+    """(page, pages, first row) with page clamped to the pages total rows fill."""
+    pages = max(1, -(-total // page_size))
+    page = min(max(int(page), 0), pages - 1)
+    return page, pages, page * page_size
+
+
+class PagedTable:
+    """A result frame served one sorted, searched page at a time."""
+
+    def __init__(self, frame, search_columns=None):
+        self.frame = frame.reset_index(drop=True)
+        self.columns = list(frame.columns)
+        self.search_columns = list(search_columns or frame.columns)
+        self._orders = {}
+        self._text = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    def order(self, column=None, descending=False):
+        """Row positions sorted by column, ties in table order and missing values last."""
+        if column is None:
+            return np.arange(len(self.frame))
+        key = column, descending
+        if key not in self._orders:
+            values = self.frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # by label rather than by category order
+                values = values.astype(values.cat.categories.dtype)
+            codes, uniques = pd.factorize(values, sort=True)
+            if descending:
+                codes = np.where(codes < 0, codes, len(uniques) - 1 - codes)
+            ranks = np.where(codes < 0, len(uniques), codes)
+            self._orders[key] = np.argsort(ranks, kind='stable')
+        return self._orders[key]
+
+    def matches(self, search):
+        """Whether each row contains search in one of its search columns, ignoring case."""
+        if self._text is None:
+            text = [self.frame[column].astype(object).where(self.frame[column].notna(), '').astype(str)
+                    for column in self.search_columns]
+            self._text = text[0].str.cat(text[1:], sep='\n').str.lower() if text else pd.Series('', index=self.frame.index)
+        return self._text.str.contains(search.lower(), regex=False).to_numpy(dtype=bool)
+
+    def page(self, page=0, page_size=PAGE_SIZE, sort=None, descending=False, search=''):
+        order = self.order(sort, descending)
+        if search:
+            order = order[self.matches(search)[order]]
+        page, pages, start = page_bounds(len(order), page, page_size)
+        return TablePage(self.frame.iloc[order[start:start + page_size]], len(order), page, pages)
@@ -0,0 +1,148 @@
+"""Timestamp parsing with one explicit format per column.
+
+The format of a column is detected once from a sample of its values and applied to the
+whole column; columns with many repeats (dates, times of day) are parsed once per
+distinct value and mapped back by code. A column no candidate fits falls back to pandas'
+format inference, as before.
+"""
+import numpy as np
+import pandas as pd
+
+from dashboard.filters import day_numbers, wall_times
+
+DATETIME_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%d %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+]
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d']
+TIME_FORMATS = ['%H:%M:%S', '%H:%M', '%H:%M:%S.%f', '%I:%M:%S %p', '%I:%M %p']
+
+SAMPLE_SIZE = 1000
+# Parse distinct values and map them back when at most this share of a sample is distinct
+MAX_DISTINCT_SHARE = 0.5
+
+# Times of day are parsed onto this date and taken as an offset from it
+TIME_BASE = pd.Timestamp('1900-01-01')
+# Zero-padded clock formats read straight from the characters: width and ':' positions
+CLOCK_FORMATS = {'%H:%M:%S': (8, (2, 5)), '%H:%M': (5, (2,))}
+
+
+def _ordered(formats, dayfirst):
+    # Day/month orders are ambiguous for days <= 12; prefer the one pandas would infer
+    later = '%m' if dayfirst else '%d'
+    return sorted(formats, key=lambda fmt: fmt.startswith(later))
+
+
+def _sample(values, size=SAMPLE_SIZE):
+    """Up to size non-null values spread evenly over the column."""
+    present = values[values.notna()]
+    if len(present) > size:
+        present = present.iloc[np.linspace(0, len(present) - 1, size).astype(np.int64)]
+    return present
+
+
+def detect_format(values, formats, dayfirst=False):
+    """The first candidate that parses the most sampled values, or None if none parses any."""
+    sample = pd.Series(_sample(values).unique())
+    best, best_count = None, 0
+    for fmt in _ordered(formats, dayfirst):
+        count = int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+        if count > best_count:
+            best, best_count = fmt, count
+            if count == len(sample):
+                break
+    return best
+
+
+def _by_distinct(values, parse):
+    """parse(values) as a numpy array, computed once per distinct value when values repeat."""
+    head = values.iloc[:SAMPLE_SIZE]
+    if head.nunique() > len(head) * MAX_DISTINCT_SHARE:
+        return parse(values).to_numpy()
+    codes, distinct = pd.factorize(values)
+    parsed = parse(pd.Series(distinct)).to_numpy()
+    # code -1 (missing) picks the trailing NaT
+    return np.append(parsed, parsed.dtype.type('NaT'))[codes]
+
+
+def parse_datetimes(values, formats=DATETIME_FORMATS, dayfirst=False):
+    """Date-time strings as a datetime Series, NaT where a value does not parse."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    fmt = detect_format(values, formats, dayfirst)
+    if fmt is None:
+        return pd.to_datetime(values, dayfirst=dayfirst, errors='coerce')
+    parsed = _by_distinct(values, lambda part: pd.to_datetime(part, format=fmt, errors='coerce'))
+    return pd.Series(parsed, index=values.index, name=values.name)
+
+
+def _strptime_times(values, fmt):
+    return pd.to_datetime(values, format=fmt, errors='coerce') - TIME_BASE
+
+
+def _clock_times(values, fmt):
+    """Zero-padded HH:MM[:SS] strings as timedeltas, computed from their character codes.
+
+    Values that are not exactly in that shape (missing, unpadded, out of range) go
+    through strptime, so the result matches parsing the whole column with fmt.
+    """
+    width, colons = CLOCK_FORMATS[fmt]
+    # One extra character per value tells longer strings apart
+    chars = values.fillna('').to_numpy(dtype=f"U{width + 1}").view(np.uint32).reshape(len(values), width + 1)
+    digits = chars[:, [i for i in range(width) if i not in colons]].astype(np.int64) - ord('0')
+    fits = (chars[:, width] == 0) & (chars[:, list(colons)] == ord(':')).all(axis=1)
+    fits &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+    fields = digits[:, 0::2] * 10 + digits[:, 1::2]
+    fits &= (fields[:, 0] < 24) & (fields[:, 1:] < 60).all(axis=1)
+    seconds = fields[:, 0] * 3600 + fields[:, 1] * 60 + (fields[:, 2] if fields.shape[1] > 2 else 0)
+
+    parsed = seconds.astype('timedelta64[s]').astype('timedelta64[us]')
+    if not fits.all():
+        parsed[~fits] = _strptime_times(values[~fits], fmt).to_numpy(dtype='timedelta64[us]')
+    return parsed
+
+
+def parse_times(values, formats=TIME_FORMATS):
+    """Time-of-day strings as a timedelta Series since midnight, NaT where unparseable."""
+    fmt = detect_format(values, formats)
+    if fmt is None:
+        return pd.to_timedelta(values, errors='coerce')
+    if fmt in CLOCK_FORMATS:
+        parsed = _clock_times(values, fmt)
+    else:
+        parsed = _by_distinct(values, lambda part: _strptime_times(part, fmt))
+    return pd.Series(parsed, index=values.index, name=values.name)
+
+
+def combine_date_time(dates, times, dayfirst=False):
+    """One timestamp from separate date and time columns, without joining them as strings."""
+    return parse_datetimes(dates, DATE_FORMATS, dayfirst) + parse_times(times)
+
+
+def add_time_columns(frame, column):
+    """Add compact day (days since the epoch) and hour columns for frame[column], -1 where missing.
+
+    Both are read from the wall time, so '10:00+05:30' is hour 10 of its local date.
+    """
+    days, valid = day_numbers(frame[column])
+    seconds = wall_times(frame[column]).astype('datetime64[s]').astype(np.int64)
+    frame['day'] = days.astype(np.int32)
+    frame['hour'] = np.where(valid, seconds // 3600 % 24, -1).astype(np.int8)
+    return frame
+
+
+def day_dates(days):
+    """Python dates for day numbers, NaT for -1, for display columns."""
+    days = np.asarray(days)
+    dates = days.astype('datetime64[D]').astype(object)
+    dates[days < 0] = pd.NaT
+    return dates
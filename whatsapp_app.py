@@ -1,11 +1,22 @@
+import functools
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime
-import json
 import plotly.express as px # Import Plotly Express for charting
 # Import column_config for enhanced dataframe customization
 from streamlit import column_config
+from dashboard.figures import TREND_BUCKETS, get_figure_cache, resample_trend
+from dashboard.loader import default_source
+from dashboard.panels import FilterSpec, PanelCache, View, compute, message_table, uses_defaults
+from dashboard.precompute import default_panel_store
+from dashboard.profiling import PROFILE_LOG_ENV, Profiler, default_log_path
+from dashboard.refresher import get_dataset_manager
+from dashboard.sqlstore import SqlView, default_sql_store
+from dashboard.sqlstore import compute as sql_compute
+from dashboard.sqlstore import message_table as sql_message_table
+from dashboard.tables import PAGE_SIZES, PagedTable
 
 # Custom CSS for overall font and bolding
 st.markdown(
@@ -35,512 +46,633 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# st.cache_data decorator for caching
-@st.cache_data
-def load_data():
-    chat  = pd.read_csv(r'https://docs.google.com/spreadsheets/d/e/2PACX-1vQC9pyPzVed8E19Ftg7HhgFkIf8hArSRhhfO0u_e7PxluqV2_TnENJOc0uEVWPyN75l49MJbuqERhJC/pub?gid=844866925&single=true&output=csv')
-    members = pd.read_csv(r'https://docs.google.com/spreadsheets/d/e/2PACX-1vQC9pyPzVed8E19Ftg7HhgFkIf8hArSRhhfO0u_e7PxluqV2_TnENJOc0uEVWPyN75l49MJbuqERhJC/pub?gid=1894345747&single=true&output=csv')
-    msgs = pd.read_csv(r'https://docs.google.com/spreadsheets/d/e/2PACX-1vQC9pyPzVed8E19Ftg7HhgFkIf8hArSRhhfO0u_e7PxluqV2_TnENJOc0uEVWPyN75l49MJbuqERhJC/pub?gid=2112209162&single=true&output=csv')
-    reactions = pd.read_csv(r'https://docs.google.com/spreadsheets/d/e/2PACX-1vQC9pyPzVed8E19Ftg7HhgFkIf8hArSRhhfO0u_e7PxluqV2_TnENJOc0uEVWPyN75l49MJbuqERhJC/pub?gid=991085987&single=true&output=csv')
-    add_leave = pd.read_csv(r'https://docs.google.com/spreadsheets/d/e/2PACX-1vQC9pyPzVed8E19Ftg7HhgFkIf8hArSRhhfO0u_e7PxluqV2_TnENJOc0uEVWPyN75l49MJbuqERhJC/pub?gid=1838297829&single=true&output=csv')
-    return chat, members, msgs, reactions, add_leave
-
-chat, members, msgs, reactions, add_leave = load_data()
-
-# Standardize chat timestamps
-chat['chat_created_at'] = pd.to_datetime(chat['chat_created_at'], dayfirst=True, errors='coerce')
-chat['date_new'] = chat['chat_created_at'].dt.date
-chat['hour'] = chat['chat_created_at'].dt.hour
-chat['chat_name'] = chat['chat_name'].str.strip()
-
-# --- MODIFIED: Extract booth number and remove rows with empty booth numbers ---
-chat['booth_number'] = chat['chat_name'].str.extract(r'(\d+)$')
-# Drop rows where 'booth_number' is NaN (meaning no numeric booth number was extracted)
-chat = chat.dropna(subset=['booth_number']).copy()
-
-# --- MODIFIED: Filter out rows with empty chat_name and those containing "#ERROR!" ---
-chat = chat[
-    (chat['chat_name'] != '') &
-    (~chat['chat_name'].str.contains('#ERROR!', na=False))
-].copy()
-
-# Infer chat_type for filtering based on user request
-# Assuming 'chat_type' column would exist in a real dataset.
-# For demonstration, infer from chat_id. Adjust if 'chat_type' is directly in your CSV.
-chat['chat_type'] = chat['chat_id'].apply(lambda x: 'group' if '@g.us' in str(x) else 'private')
-
-# Filter only group chats using the new 'chat_type' column
-group_chat = chat[chat['chat_type'] == 'group'].copy()
-
-# Members
-group_members = members[members['chat_id'].isin(group_chat['chat_id'])]
-group_sizes = group_members.groupby('chat_id')['contact_phone_number'].nunique().reset_index(name='count')
-group_admins = group_members[group_members['contact_is_admin'] == True].groupby('chat_id')['contact_phone_number'].nunique()
-
-def group_category(row, admin_counts):
-    if row['count'] == 1:
-        return "2-Way Group"
-    elif row['chat_id'] in admin_counts.index and admin_counts.loc[row['chat_id']] >= 1:
-        return "Admin Managed Group"
+# Wall time and rows in/out per section of this run. The profile panel is opt-in (?debug=1
+# or WA_DEBUG=1); allocation tracing is switched on from it, and WA_PROFILE_LOG (or the
+# panel) appends every run to a JSONL log.
+debug_mode = st.query_params.get('debug') == '1' or bool(os.environ.get('WA_DEBUG'))
+trace_memory = debug_mode and st.session_state.get('profile_trace_memory', False)
+profiler = Profiler(trace_memory=trace_memory)
+
+# Streamlit stops a rerun by raising inside the script (st.rerun, st.stop, a failing panel), so the
+# profile is finished, and its allocation trace released, whichever way the run ends
+try:
+    def profile_log_path():
+        """Where runs are logged: WA_PROFILE_LOG, else the default log once the panel's toggle is on."""
+        if debug_mode and st.session_state.get('profile_log'):
+            return default_log_path()
+        return os.environ.get(PROFILE_LOG_ENV)
+
+    # With WA_SQLITE_PATH set the dashboard runs out of core: panels are SQL queries against the
+    # indexed database built by `python -m dashboard.sqlstore` and only their results are loaded.
+    sql_store = default_sql_store()
+
+    profiler.begin('Load')
+    if sql_store is not None:
+        if st.sidebar.button("🔄 Refresh data") or not sql_store.exists():
+            # Re-ingest the tabs in chunks and swap the new database in
+            sql_store.ingest(default_source())
+        sql_meta = sql_store.meta()
+        data_key = sql_meta['data_key']
+        pipeline = None
+    else:
+        # One dataset per process, shared by every session: tabs are fetched concurrently (or read
+        # from WA_DATA_DIR), memory-mapped from the on-disk snapshot, and refreshed by a background
+        # thread every WA_REFRESH_SECONDS. Reruns serve the current snapshot and never wait on a
+        # refresh; the new one is swapped in once its pipeline is built.
+        data_manager = get_dataset_manager()
+        if st.sidebar.button("🔄 Refresh data"):
+            data_manager.request_refresh()
+        if st.sidebar.button("♻️ Rebuild data", help="Re-download every tab and rewrite the snapshot, picking up edited or deleted rows."):
+            data_manager.request_refresh(full=True)
+        dataset = data_manager.current()
+        data_key = dataset.key
+        profiler.end(rows_out=tuple(dataset.rows.values()))
+
+        # Preprocessing (timestamps, booth numbers, mimetypes, cleaned IDs) is memoized per content
+        # hash of the raw tables and built by the refresher before the dataset is swapped in, so
+        # reruns only filter and render; the stage build times are in the profile panel.
+        pipeline = dataset.pipeline
+
+    # Above this many messages the overview defaults to sketch-based distinct counts
+    APPROX_COUNTS_ABOVE_ROWS = 1_000_000
+
+    # Choices for the number of most reacted messages; the first is the panel's default, which is precomputed
+    TOP_REACTED_CHOICES = [5, 10, 25, 50]
+
+    # --- Streamlit Dashboard ---
+    st.set_page_config(page_title="WhatsApp Group Dashboard", layout="wide")
+    st.title("📱 WhatsApp Group Engagement Dashboard")
+
+    # --- Sidebar Filters ---
+    st.sidebar.header("Filters")
+
+    def _age_label(seconds):
+        if seconds < 60:
+            return f"{seconds:.0f}s"
+        if seconds < 3600:
+            return f"{seconds / 60:.0f} min"
+        return f"{seconds / 3600:.1f} h"
+
+    if pipeline is not None:
+        refresh_status = "refreshing…" if data_manager.refreshing else f"updated {_age_label(data_manager.age())} ago"
+        st.sidebar.caption(f"Data version {dataset.version} ({data_key[:8]}), {refresh_status}")
+        if data_manager.last_error:
+            st.sidebar.caption(f"⚠️ Last refresh failed, showing the previous data: {data_manager.last_error}")
+        malformed_media = pipeline['media_stats']['malformed']
+    else:
+        malformed_media = int(sql_meta['malformed_media'])
+    if malformed_media:
+        st.sidebar.caption(f"⚠️ {malformed_media} messages have unreadable media data and are shown without a type.")
+
+    if pipeline is not None:
+        # Per-table memory before/after the compact dtype layer (shared categorical IDs)
+        _, _, memory_report = pipeline['compact']
+        with st.sidebar.expander("Data memory"):
+            st.dataframe(memory_report, hide_index=True)
+
+    # Date Range Filter
+    # Min/max dates across all relevant dataframes
+    min_date, max_date = pipeline['date_bounds'] if pipeline is not None else sql_store.date_bounds()
+
+
+    # Filtering runs on a per-dataset index (time-sorted row positions, chat_id -> row ranges,
+    # group name / booth -> chat lookups) and results are memoized per filter selection.
+    # Out of core the chat lookups are indexed queries.
+    find_chats = pipeline['filter_engine'].chats if pipeline is not None else sql_store.chats
+
+    profiler.begin('Sidebar filtering')
+    start_date = end_date = None
+
+    if min_date and max_date:
+        selected_date_range = st.sidebar.date_input(
+            "Select Date Range",
+            value=(min_date, max_date),
+            min_value=min_date,
+            max_value=max_date
+        )
+        # Ensure selected_date_range is a tuple of two dates
+        if len(selected_date_range) == 2:
+            start_date, end_date = selected_date_range
+        elif len(selected_date_range) == 1: # If only one date is selected, assume it's both start and end
+            start_date = end_date = selected_date_range[0]
+        else: # Default to full range if selection is incomplete
+            start_date, end_date = min_date, max_date
     else:
-        return "Multi-Participant Group (No Admin)"
-
-group_sizes['type'] = group_sizes.apply(lambda row: group_category(row, group_admins), axis=1)
-
-# Messages
-msgs['timestamp'] = pd.to_datetime(msgs['received_at_date'] + ' ' + msgs['received_at_time'], errors='coerce')
-msgs['date_new'] = msgs['timestamp'].dt.date
-msgs['hour'] = msgs['timestamp'].dt.hour
-msgs['mimetype'] = msgs['media'].apply(lambda x: json.loads(x).get('mimetype') if pd.notnull(x) else 'text')
-
-# Reactions
-reactions['timestamp'] = pd.to_datetime(reactions['timestamp'], errors='coerce')
-reactions['date_new'] = reactions['timestamp'].dt.date
-reactions['hour'] = reactions['timestamp'].dt.hour
-
-# Add/Leave
-add_leave['timestamp'] = pd.to_datetime(add_leave['timestamp'], errors='coerce')
-add_leave['date_new'] = add_leave['timestamp'].dt.date
-add_leave['hour'] = add_leave['timestamp'].dt.hour
-
-# --- Clean IDs for display ---
-def clean_id(df, column_name):
-    if column_name in df.columns:
-        df[column_name] = df[column_name].astype(str).str.replace('@c.us', '').str.replace('@g.us', '')
-    return df
-
-members = clean_id(members.copy(), 'contact_phone_number')
-msgs = clean_id(msgs.copy(), 'sender_phone')
-reactions = clean_id(reactions.copy(), 'sender_id')
-# chat_id is used for filtering, so we only clean it for display if needed later, not at source.
-
-# --- Streamlit Dashboard ---
-st.set_page_config(page_title="WhatsApp Group Dashboard", layout="wide")
-st.title("📱 WhatsApp Group Engagement Dashboard")
-
-# --- Sidebar Filters ---
-st.sidebar.header("Filters")
-
-# Date Range Filter
-# Find min/max dates across all relevant dataframes
-all_dates = pd.concat([
-    chat['date_new'].dropna(),
-    msgs['date_new'].dropna(),
-    reactions['date_new'].dropna(),
-    add_leave['date_new'].dropna()
-])
-
-min_date = all_dates.min() if not all_dates.empty else datetime.now().date()
-max_date = all_dates.max() if not all_dates.empty else datetime.now().date()
-
-
-filtered_chat = chat
-filtered_msgs = msgs
-filtered_reactions = reactions
-filtered_add_leave = add_leave
-
-if min_date and max_date:
-    selected_date_range = st.sidebar.date_input(
-        "Select Date Range",
-        value=(min_date, max_date),
-        min_value=min_date,
-        max_value=max_date
-    )
-    # Ensure selected_date_range is a tuple of two dates
-    if len(selected_date_range) == 2:
-        start_date, end_date = selected_date_range
-    elif len(selected_date_range) == 1: # If only one date is selected, assume it's both start and end
-        start_date = end_date = selected_date_range[0]
-    else: # Default to full range if selection is incomplete
-        start_date, end_date = min_date, max_date
-
-    # Apply initial date filters
-    filtered_chat = chat[(chat['date_new'] >= start_date) & (chat['date_new'] <= end_date)]
-    filtered_msgs = msgs[(msgs['date_new'] >= start_date) & (msgs['date_new'] <= end_date)]
-    filtered_reactions = reactions[(reactions['date_new'] >= start_date) & (reactions['date_new'] <= end_date)]
-    filtered_add_leave = add_leave[(add_leave['date_new'] >= start_date) & (add_leave['date_new'] <= end_date)]
-else:
-    st.sidebar.warning("No date data available for filtering.")
-
-
-# Group Name Filter
-# Get unique chat names from the initially filtered chat data, dropping NaN values and empty strings before sorting
-valid_group_names = [name for name in filtered_chat['chat_name'].dropna().unique().tolist() if str(name).strip() != '']
-group_names = ['All Groups'] + sorted(valid_group_names)
-selected_group_name = st.sidebar.selectbox("Select Group Name", group_names)
-
-if selected_group_name != 'All Groups':
-    # Filter all dataframes based on the selected group name
-    filtered_chat = filtered_chat[filtered_chat['chat_name'] == selected_group_name]
-    filtered_msgs = filtered_msgs[filtered_msgs['chat_id'].isin(filtered_chat['chat_id'])]
-    filtered_reactions = filtered_reactions[filtered_reactions['chat_id'].isin(filtered_chat['chat_id'])]
-    filtered_add_leave = filtered_add_leave[filtered_add_leave['chat_id'].isin(filtered_chat['chat_id'])]
-
-
-# Booth Number Filter
-# Get unique booth numbers from the currently filtered chat data, dropping NaN values before sorting
-# Convert to string to ensure consistent sorting, then sort
-booth_numbers_raw = filtered_chat['booth_number'].dropna().unique().tolist()
-# Custom sort for booth numbers: 'N/A' at the end, then numeric sort
-def sort_booth_numbers(x):
-    if x == 'N/A':
-        return (1, x) # Put N/A at the end
-    try:
-        return (0, int(x)) # Sort numbers numerically
-    except ValueError:
-        return (0, x) # Fallback for other non-numeric strings
-
-booth_numbers = ['All Booths'] + sorted(booth_numbers_raw, key=sort_booth_numbers)
-selected_booth_number = st.sidebar.selectbox("Select Booth Number", booth_numbers)
-
-if selected_booth_number != 'All Booths':
-    # Filter all dataframes based on the selected booth number
-    filtered_chat = filtered_chat[filtered_chat['booth_number'].astype(str) == selected_booth_number]
-    filtered_msgs = filtered_msgs[filtered_msgs['chat_id'].isin(filtered_chat['chat_id'])]
-    filtered_reactions = filtered_reactions[filtered_reactions['chat_id'].isin(filtered_chat['chat_id'])]
-    filtered_add_leave = filtered_add_leave[filtered_add_leave['chat_id'].isin(filtered_chat['chat_id'])]
-
-
-# Overview Metrics (using filtered data)
-total_groups = filtered_chat['chat_id'].nunique()
-# total_participants and unique_participants should ideally be based on members of the *filtered* groups
-# This requires re-calculating group_members based on filtered_chat
-filtered_group_members = members[members['chat_id'].isin(filtered_chat['chat_id'])]
-total_participants = filtered_group_members['contact_phone_number'].count()
-unique_participants = filtered_group_members['contact_phone_number'].nunique()
-
-active_participants = filtered_msgs['sender_phone'].nunique()
-percent_active = active_participants / total_participants * 100 if total_participants > 0 else 0
-groups_with_msgs = filtered_msgs['chat_id'].nunique()
-percent_active_groups = groups_with_msgs / total_groups * 100 if total_groups > 0 else 0
-
-st.header("📊 Overview")
-col1, col2, col3, col4, col5 = st.columns(5)
-
-# Beautify cards with bold text and colors
-card_style = """
-    background-color: #F0F2F6; /* Light gray */
-    padding: 15px;
-    border-radius: 10px;
-    text-align: center;
-    font-weight: bold;
-    box-shadow: 2px 2px 5px rgba(0,0,0,0.1); /* Add subtle shadow */
-"""
-
-with col1:
-    st.markdown(f"<div style='{card_style} background-color: #E6F7FF; color: #0056B3;'>Total Groups<br><span style='font-size:32px;'>{total_groups}</span></div>", unsafe_allow_html=True)
-with col2:
-    st.markdown(f"<div style='{card_style} background-color: #FFF0E6; color: #B35900;'>Total Participants<br><span style='font-size:32px;'>{total_participants}</span></div>", unsafe_allow_html=True)
-with col3:
-    st.markdown(f"<div style='{card_style} background-color: #E6FFEC; color: #008033;'>Unique Participants<br><span style='font-size:32px;'>{unique_participants}</span></div>", unsafe_allow_html=True)
-with col4:
-    st.markdown(f"<div style='{card_style} background-color: #F0E6FF; color: #6600B3;'>% Active Participants<br><span style='font-size:32px;'>{percent_active:.2f}%</span></div>", unsafe_allow_html=True)
-with col5:
-    st.markdown(f"<div style='{card_style} background-color: #FFE6E6; color: #B30000;'>% Active Groups<br><span style='font-size:32px;'>{percent_active_groups:.2f}%</span></div>", unsafe_allow_html=True)
-
-
-# Create three columns for the charts with explicit widths and gap
-chart_col1, chart_col2, chart_col3 = st.columns([1, 1, 1], gap="medium")
-
-with chart_col1:
-    # Use st.markdown for title to control wrapping and alignment
-    st.markdown("<h3 style='white-space: nowrap; text-align: center; font-size: 18px; font-weight: bold; color: #333333;'>🧠 Group Type Distribution</h3>", unsafe_allow_html=True)
-    filtered_group_sizes = filtered_group_members.groupby('chat_id')['contact_phone_number'].nunique().reset_index(name='count')
-    filtered_group_admins = filtered_group_members[filtered_group_members['contact_is_admin'] == True].groupby('chat_id')['contact_phone_number'].nunique()
-    filtered_group_sizes['type'] = filtered_group_sizes.apply(lambda row: group_category(row, filtered_group_admins), axis=1)
-
-    if not filtered_group_sizes.empty:
-        group_type_counts = filtered_group_sizes['type'].value_counts().reset_index()
-        group_type_counts.columns = ['Group Type', 'Count']
+        st.sidebar.warning("No date data available for filtering.")
+
+
+    # Group Name Filter
+    # Get unique chat names from the date-filtered chat data, dropping NaN values and empty strings before sorting
+    chats_in_range = find_chats(start_date, end_date)
+    valid_group_names = [name for name in chats_in_range['chat_name'].dropna().unique().tolist() if str(name).strip() != '']
+    group_names = ['All Groups'] + sorted(valid_group_names)
+    selected_group_name = st.sidebar.selectbox("Select Group Name", group_names)
+    group_filter = None if selected_group_name == 'All Groups' else selected_group_name
+
+
+    # Booth Number Filter
+    # Get unique booth numbers from the currently filtered chat data, dropping NaN values before sorting
+    # Convert to string to ensure consistent sorting, then sort
+    booth_numbers_raw = find_chats(start_date, end_date, group_filter)['booth_number'].dropna().unique().tolist()
+    # Custom sort for booth numbers: 'N/A' at the end, then numeric sort
+    def sort_booth_numbers(x):
+        if x == 'N/A':
+            return (1, x) # Put N/A at the end
+        try:
+            return (0, int(x)) # Sort numbers numerically
+        except ValueError:
+            return (0, x) # Fallback for other non-numeric strings
+
+    booth_numbers = ['All Booths'] + sorted(booth_numbers_raw, key=sort_booth_numbers)
+    selected_booth_number = st.sidebar.selectbox("Select Booth Number", booth_numbers)
+    booth_filter = None if selected_booth_number == 'All Booths' else selected_booth_number
+
+    # Distinct participant counts: exact nunique over the filtered rows, or HyperLogLog sketches
+    # per chat and day merged for the selection (the default once msgs is large). SQL counts
+    # are always exact.
+    exact_counts = True
+    if pipeline is not None:
+        exact_counts = st.sidebar.toggle(
+            "Exact participant counts",
+            value=len(pipeline['msgs']) <= APPROX_COUNTS_ABOVE_ROWS,
+            help="Turn off to estimate unique and active participants from sketches, which stays fast on large histories."
+        )
+
+    # Panels are computed by dashboard.panels (or dashboard.sqlstore out of core) for this
+    # selection. Members always follow the filtered groups; msgs, reactions and add_leave are
+    # narrowed to them only once a group or booth is chosen.
+    selection = FilterSpec(start_date, end_date, group_filter, booth_filter)
+    if pipeline is not None:
+        view, compute_panel, compute_messages = View(pipeline, selection), compute, message_table
+    else:
+        view, compute_panel, compute_messages = SqlView(sql_store, selection), sql_compute, sql_message_table
+
+    # Selections precomputed by `python -m dashboard.precompute` for this data are read from disk
+    panel_store = default_panel_store() if pipeline is not None else None
+    precomputed = (panel_store.load(data_key, view.spec) if panel_store is not None else None) or {}
+    profiler.end()
+
+
+    # Panel results are kept per session, keyed by data, selection, panel and options, so reruns
+    # that leave a panel's inputs unchanged (another panel's widget, a tab switch) reuse them.
+    panel_cache = st.session_state.setdefault('panel_cache', PanelCache())
+
+
+    def panel_result(view, name, title, **options):
+        """Start the profile section for a panel and return its result for the current view."""
+        if name in precomputed and uses_defaults(name, options):
+            return profiler.begin(title, source='precomputed').out(precomputed[name])
+        key = PanelCache.key(data_key, view.spec, name, options)
+        cached, result = panel_cache.get(key)
+        if cached:
+            return profiler.begin(title, source='session').out(result)
+        section = profiler.begin(title, rows_in=view.inputs(name), source='sql' if pipeline is None else 'computed')
+        result = section.out(compute_panel(name, view, **options))
+        panel_cache.put(key, result)
+        return result
+
+
+    def paged_result(view, name, title):
+        """A table panel's result as a PagedTable, whose sort orders are kept with it in the session."""
+        key = PanelCache.key(data_key, view.spec, name, {'paged': True})
+        cached, table = panel_cache.get(key)
+        if cached:
+            profiler.begin(title, source='session').out(table.frame)
+            return table
+        table = PagedTable(panel_result(view, name, title))
+        panel_cache.put(key, table)
+        return table
+
+
+    def message_result(view, title, **target):
+        """The messages of one POC or group as a table served page by page."""
+        key = PanelCache.key(data_key, view.spec, 'messages', target)
+        cached, table = panel_cache.get(key)
+        if cached:
+            return table
+        if pipeline is not None:
+            profiler.begin(title, rows_in=view.frames.msgs, source='computed')
+        else:
+            profiler.begin(title, source='sql')
+        table = compute_messages(view, **target)
+        panel_cache.put(key, table)
+        return table
+
+
+    def show_table(table, key, column_config=None, selectable=False):
+        """Search, sort and page controls over a server-side table and the current page of it.
+
+        Only the page is sent to the browser. With selectable, a row can be picked and the
+        selected row is returned (else None).
+        """
+        page_key = f"{key}_page"
+
+        def first_page():
+            st.session_state[page_key] = 1
+
+        search_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+        search = search_col.text_input("Search", key=f"{key}_search", placeholder="Search rows", on_change=first_page)
+        sort = sort_col.selectbox("Sort by", [None] + table.columns, key=f"{key}_sort", on_change=first_page,
+                                  format_func=lambda column: "Default order" if column is None else column)
+        descending = order_col.toggle("Descending", key=f"{key}_descending", on_change=first_page)
+        page_size = size_col.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_size", on_change=first_page)
+
+        page = table.page(st.session_state.get(page_key, 1) - 1, page_size, sort, descending, search.strip())
+        # The page may have been clamped to a shorter result
+        st.session_state[page_key] = page.page + 1
+        selection = None
+        if selectable:
+            selection = st.dataframe(page.rows, column_config=column_config, hide_index=True, key=f"{key}_rows",
+                                     on_select='rerun', selection_mode='single-row')
+        else:
+            st.dataframe(page.rows, column_config=column_config, hide_index=True)
+
+        info_col, page_col = st.columns([5, 1])
+        first_row = page.page * page_size
+        info_col.caption(f"Rows {first_row + 1 if page.total else 0}–{first_row + len(page.rows)} of {page.total}")
+        page_col.number_input("Page", min_value=1, max_value=page.pages, step=1, key=page_key)
+        if selection is not None and selection.selection.rows:
+            return page.rows.iloc[selection.selection.rows[0]]
+        return None
+
+
+    # Message drill-down below a POC or group row
+    message_column_config = {
+        "Date": column_config.DateColumn("📅 Date", width="small"),
+        "Hour": column_config.NumberColumn("🕒 Hour", width="small"),
+        "Group Name": column_config.Column("👥 Group Name", width="medium"),
+        "Sender": column_config.Column("📞 Sender", width="medium"),
+        "Msg Type": column_config.Column("📄 Message Type", width="small"),
+        "Message": column_config.Column("💬 Message Content", width="large"),
+    }
+
+
+    # Figures are built once per chart, data and layout and shared by all sessions (see
+    # dashboard.figures), so a rerun only serializes charts whose data did not change.
+    figure_cache = get_figure_cache()
+
+
+    def pie_chart(data):
+        fig = px.pie(data, names='Group Type', values='Count',
+                     color_discrete_sequence=["#4C78A8", "#57A773", "#F58518"], # Added more colors for pie
+                     hole=0.4) # Donut chart
+        fig.update_layout(
+            height=320, # Adjusted height
+            title_text=None, # Explicitly set title_text to None to remove "undefined"
+            margin=dict(t=30, b=30, l=30, r=30), # Adjust margins for pie chart
+            legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5) # Legend at bottom
+        )
+        # Changed to show only values (numbers)
+        fig.update_traces(textposition='inside', textinfo='value')
+        return fig
+
+
+    def bar_chart(data, y, colors):
+        fig = px.bar(data, x='Msg Type', y=y, color_discrete_sequence=list(colors))
+        fig.update_layout(
+            xaxis_title=None, # Removed x-axis title
+            yaxis_title=None, # Removed y-axis title
+            xaxis_tickfont_color='black',
+            yaxis_tickfont_color='black',
+            height=320, # Adjusted height
+            title_text=None # Explicitly set title_text to None to remove "undefined"
+        )
+        # Changed textposition to 'auto'
+        fig.update_traces(texttemplate='%{y}', textposition='auto', textfont=dict(color='black', size=12))
+        return fig
+
+
+    def trend_chart(data, x, title, xaxis_title):
+        fig = px.line(data, x=x, y='Message Count', title=title)
+        fig.update_layout(
+            xaxis_title=xaxis_title,
+            xaxis_title_font_color='black', xaxis_tickfont_color='black',
+            yaxis_title_font_color='black', yaxis_tickfont_color='black'
+        )
+        return fig
+
+
+    def panel_fragment(func):
+        """Run a panel as a fragment, profiled on its own when it reruns without the script.
+
+        The script's profiler is finished by then, so a fragment rerun gets a fresh one; its
+        sections are logged like a full run (tagged with the fragment) and kept in the session
+        for the profile panel.
+        """
+        @st.fragment
+        @functools.wraps(func)
+        def run(view):
+            global profiler
+            if not profiler.finished:
+                return func(view)
+            profiler = Profiler(trace_memory=trace_memory)
+            try:
+                return func(view)
+            finally:
+                total = profiler.finish()
+                st.session_state['fragment_profile'] = func.__name__, total, profiler.records
+                log_path = profile_log_path()
+                if log_path:
+                    profiler.append_log(log_path, data_key=data_key, fragment=func.__name__, filters=view.spec._asdict())
+        return run
+
+
+    # Each panel is a fragment called with the view it renders: a widget inside a panel reruns
+    # only that panel, while a sidebar change reruns the script and every panel with the new view.
+    @panel_fragment
+    def overview_section(view):
+        """Overview cards."""
+        # Overview Metrics (using filtered data)
+        overview = panel_result(view, 'overview', 'Overview', exact=exact_counts)
+        total_groups = overview['total_groups']
+        total_participants = overview['total_participants']
+        unique_participants = overview['unique_participants']
+        percent_active = overview['percent_active']
+        percent_active_groups = overview['percent_active_groups']
+
+        st.header("📊 Overview")
+        col1, col2, col3, col4, col5 = st.columns(5)
+
+        # Beautify cards with bold text and colors
+        card_style = """
+            background-color: #F0F2F6; /* Light gray */
+            padding: 15px;
+            border-radius: 10px;
+            text-align: center;
+            font-weight: bold;
+            box-shadow: 2px 2px 5px rgba(0,0,0,0.1); /* Add subtle shadow */
+        """
+
+        with col1:
+            st.markdown(f"<div style='{card_style} background-color: #E6F7FF; color: #0056B3;'>Total Groups<br><span style='font-size:32px;'>{total_groups}</span></div>", unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"<div style='{card_style} background-color: #FFF0E6; color: #B35900;'>Total Participants<br><span style='font-size:32px;'>{total_participants}</span></div>", unsafe_allow_html=True)
+        with col3:
+            st.markdown(f"<div style='{card_style} background-color: #E6FFEC; color: #008033;'>Unique Participants<br><span style='font-size:32px;'>{unique_participants}</span></div>", unsafe_allow_html=True)
+        with col4:
+            st.markdown(f"<div style='{card_style} background-color: #F0E6FF; color: #6600B3;'>% Active Participants<br><span style='font-size:32px;'>{percent_active:.2f}%</span></div>", unsafe_allow_html=True)
+        with col5:
+            st.markdown(f"<div style='{card_style} background-color: #FFE6E6; color: #B30000;'>% Active Groups<br><span style='font-size:32px;'>{percent_active_groups:.2f}%</span></div>", unsafe_allow_html=True)
+        if overview['estimated']:
+            st.caption(f"Unique Participants and % Active Participants are estimates (±{pipeline['sketches'].relative_error * 100:.1f}% standard error).")
+
+
+    @panel_fragment
+    def group_types_section(view):
+        """Group type donut."""
+        group_type_counts = panel_result(view, 'group_types', 'Group Type Distribution')
+        # Use st.markdown for title to control wrapping and alignment
+        st.markdown("<h3 style='white-space: nowrap; text-align: center; font-size: 18px; font-weight: bold; color: #333333;'>🧠 Group Type Distribution</h3>", unsafe_allow_html=True)
 
         if not group_type_counts.empty:
-            fig = px.pie(group_type_counts, names='Group Type', values='Count',
-                         color_discrete_sequence=["#4C78A8", "#57A773", "#F58518"], # Added more colors for pie
-                         hole=0.4) # Donut chart
-            fig.update_layout(
-                height=320, # Adjusted height
-                title_text=None, # Explicitly set title_text to None to remove "undefined"
-                margin=dict(t=30, b=30, l=30, r=30), # Adjust margins for pie chart
-                legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5) # Legend at bottom
-            )
-            # Changed to show only values (numbers)
-            fig.update_traces(textposition='inside', textinfo='value')
+            fig = figure_cache.get('group_types', group_type_counts, pie_chart)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No group type data available for the selected filters.")
-    else:
-        st.info("No group type data available for the selected filters.")
-
-with chart_col2:
-    # Use st.markdown for title to control wrapping and alignment
-    st.markdown("<h3 style='white-space: nowrap; text-align: center; font-size: 18px; font-weight: bold; color: #333333;'>📦 Messages by Type</h3>", unsafe_allow_html=True)
-    mimetype_msg_counts = filtered_msgs['mimetype'].value_counts().reset_index()
-    mimetype_msg_counts.columns = ['Msg Type', 'Count']
-
-    # Rename mimetype categories for better display
-    mimetype_msg_counts['Msg Type'] = mimetype_msg_counts['Msg Type'].replace({
-        'text': 'Text',
-        'video/mp4': 'Video',
-        'image/jpeg': 'Image',
-        'audio/mpeg': 'Audio'
-    })
-
-    if not mimetype_msg_counts.empty:
+
+
+    @panel_fragment
+    def message_types_section(view):
+        """Messages per type."""
+        # Message counts per mimetype, with display names for the common types
+        mimetype_msg_counts = panel_result(view, 'message_types', 'Messages by Type')
+        # Use st.markdown for title to control wrapping and alignment
+        st.markdown("<h3 style='white-space: nowrap; text-align: center; font-size: 18px; font-weight: bold; color: #333333;'>📦 Messages by Type</h3>", unsafe_allow_html=True)
+
         if not mimetype_msg_counts.empty:
-            fig = px.bar(mimetype_msg_counts, x='Msg Type', y='Count',
-                         color_discrete_sequence=["#57A773", "#4C78A8", "#F58518", "#B30000"])
-            fig.update_layout(
-                xaxis_title=None, # Removed x-axis title
-                yaxis_title=None, # Removed y-axis title
-                xaxis_tickfont_color='black', 
-                yaxis_tickfont_color='black', 
-                height=320, # Adjusted height
-                title_text=None # Explicitly set title_text to None to remove "undefined"
-            )
-            # Changed textposition to 'auto'
-            fig.update_traces(texttemplate='%{y}', textposition='auto', textfont=dict(color='black', size=12))
+            fig = figure_cache.get('message_types', mimetype_msg_counts, bar_chart,
+                                   y='Count', colors=("#57A773", "#4C78A8", "#F58518", "#B30000"))
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No message Msg Type data available for the selected filters.")
-    else:
-        st.info("No message Msg Type data available for the selected filters.")
-
-with chart_col3:
-    # Use st.markdown for title to control wrapping and alignment
-    st.markdown("<h3 style='white-space: nowrap; text-align: center; font-size: 18px; font-weight: bold; color: #333333;'>👍 Reactions by Message Type</h3>", unsafe_allow_html=True)
-    if not filtered_reactions.empty and not filtered_msgs.empty:
-        reactions_with_mimetype = filtered_reactions.merge(
-            filtered_msgs[['message_id', 'mimetype']],
-            on='message_id',
-            how='inner'
-        )
-        reactions_mimetype_counts = reactions_with_mimetype['mimetype'].value_counts().reset_index()
-        reactions_mimetype_counts.columns = ['Msg Type', 'Reaction Count']
-
-        # Rename mimetype categories for better display in reactions chart
-        reactions_mimetype_counts['Msg Type'] = reactions_mimetype_counts['Msg Type'].replace({
-            'text': 'Text',
-            'video/mp4': 'Video',
-            'image/jpeg': 'Image',
-            'audio/mpeg': 'Audio'
-        })
-
-        if not reactions_mimetype_counts.empty:
-            if not reactions_mimetype_counts.empty:
-                fig = px.bar(reactions_mimetype_counts, x='Msg Type', y='Reaction Count',
-                             color_discrete_sequence=["#F58518", "#57A773", "#4C78A8"])
-                fig.update_layout(
-                    xaxis_title=None, # Removed x-axis title
-                    yaxis_title=None, # Removed y-axis title
-                    xaxis_tickfont_color='black',
-                    yaxis_tickfont_color='black',
-                    height=320, # Adjusted height
-                    title_text=None # Explicitly set title_text to None to remove "undefined"
-                )
-                # Changed textposition to 'auto'
-                fig.update_traces(texttemplate='%{y}', textposition='auto', textfont=dict(color='black', size=12))
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("No reaction Msg Type data available for the selected filters.")
-    else:
-        st.info("Not enough message or reaction data to show reactions by Msg Type for the selected filters.")
 
 
-st.header("🚦 Group Health")
-st.subheader("Top 5 Most Reacted Messages")
-# Engagement & Reactions (using filtered data)
-# Merge reactions with messages to get message body and mimetype
-reacted_msgs = filtered_reactions.merge(
-    filtered_msgs[['message_id', 'message_body', 'mimetype']],
-    on='message_id',
-    how='inner'
-)
-# Group by message_id, message_body, mimetype and count reactions
-top_reacted_msgs = reacted_msgs.groupby(['message_id', 'message_body', 'mimetype']).size().reset_index(name='No. of Reactions')
-top_reacted_msgs = top_reacted_msgs.nlargest(5, 'No. of Reactions')
-
-if not top_reacted_msgs.empty:
-    # Rename columns for display
-    top_reacted_msgs = top_reacted_msgs.rename(columns={
-        'message_body': 'Message',
-        'mimetype': 'Msg Type'
-    }).drop(columns=['message_id']) # Remove message_id
-
-    # Define column configuration for top_reacted_msgs
-    top_reacted_msgs_column_config = {
-        "Message": column_config.Column(
-            "💬 Message Content",
-            help="The content of the message.",
-            width="large"
-        ),
-        "Msg Type": column_config.Column(
-            "📄 Message Type",
-            help="The type of the message (e.g., text, image, video).",
-            width="medium"
-        ),
-        "No. of Reactions": column_config.Column(
-            "👍 Reactions Count",
-            help="The total number of reactions received by the message.",
-            width="small"
-        ),
-    }
-    st.dataframe(top_reacted_msgs, column_config=top_reacted_msgs_column_config, hide_index=True)
-else:
-    st.info("No reaction data available for the selected filters.")
-
-st.subheader("Participants Added and Left by Group")
-# Added/Left (using filtered data)
-added_by_group = filtered_add_leave[filtered_add_leave['type'] == 'add'].groupby('chat_id').size().reset_index(name='Participants Added')
-left_by_group = filtered_add_leave[filtered_add_leave['type'] == 'leave'].groupby('chat_id').size().reset_index(name='Participants Left')
-
-# Merge with chat data to get group names and booth numbers
-add_leave_summary_df = filtered_chat[['chat_id', 'chat_name', 'booth_number']].drop_duplicates().merge(
-    added_by_group, on='chat_id', how='left'
-).merge(
-    left_by_group, on='chat_id', how='left'
-).fillna(0)
-
-# Select and rename columns for display
-add_leave_summary_df = add_leave_summary_df.rename(columns={
-    'chat_name': 'Group Name',
-    'booth_number': 'Booth Number'
-}).drop(columns=['chat_id']) # Remove chat_id
-
-# --- NEW: Filter to show groups with 1 or more participants added OR left ---
-add_leave_summary_df = add_leave_summary_df[
-    (add_leave_summary_df['Participants Added'] >= 1) |
-    (add_leave_summary_df['Participants Left'] >= 1)
-].copy()
-
-
-if not add_leave_summary_df.empty:
-    # Define column configuration for add_leave_summary_df
-    add_leave_summary_column_config = {
-        "Group Name": column_config.Column(
-            "👥 Group Name",
-            help="The name of the WhatsApp group.",
-            width="large"
-        ),
-        "Booth Number": column_config.Column(
-            "🎪 Booth Number",
-            help="The associated booth number for the group.",
-            width="medium"
-        ),
-        "Participants Added": column_config.Column(
-            "➕ Participants Added",
-            help="Number of participants added to this group.",
-            width="small"
-        ),
-        "Participants Left": column_config.Column(
-            "➖ Participants Left",
-            help="Number of participants who left this group.",
-            width="small"
-        ),
-    }
-    st.dataframe(add_leave_summary_df, column_config=add_leave_summary_column_config, hide_index=True)
-else:
-    st.info("No add/leave data available for the selected filters where participants were added or left.")
-
-
-st.header("🧑‍💼 POC Analysis (Group Admins as POCs)")
-# POC Analysis: Consider group admins as POCs
-# Get unique admin phone numbers from the filtered group members
-poc_phone_numbers = filtered_group_members[filtered_group_members['contact_is_admin'] == True]['contact_phone_number'].unique()
-
-if len(poc_phone_numbers) > 0:
-    poc_data = []
-    for poc_phone in poc_phone_numbers:
-        # Total groups where this admin is present
-        total_groups_for_poc = filtered_group_members[
-            (filtered_group_members['contact_phone_number'] == poc_phone) &
-            (filtered_group_members['contact_is_admin'] == True)
-        ]['chat_id'].nunique()
-
-        # Active groups based on messages sent by this POC
-        active_groups_for_poc = filtered_msgs[
-            filtered_msgs['sender_phone'] == poc_phone
-        ]['chat_id'].nunique()
-
-        # Total messages sent by this POC
-        total_messages_by_poc = filtered_msgs[
-            filtered_msgs['sender_phone'] == poc_phone
-        ].shape[0]
-
-        poc_data.append({
-            'POC Phone Number': poc_phone,
-            'Total Groups (Admin Of)': total_groups_for_poc,
-            'Active Groups (Sent Msgs)': active_groups_for_poc,
-            'Total Messages Sent': total_messages_by_poc
-        })
-
-    poc_summary_df = pd.DataFrame(poc_data)
-    # Define column configuration for poc_summary_df
-    poc_summary_column_config = {
-        "POC Phone Number": column_config.Column(
-            "📞 POC Number",
-            help="The phone number of the Point of Contact (Group Admin).",
-            width="medium"
-        ),
-        "Total Groups (Admin Of)": column_config.Column(
-            "🏘️ Groups Admin Of",
-            help="Total number of groups where this POC is an admin.",
-            width="small"
-        ),
-        "Active Groups (Sent Msgs)": column_config.Column(
-            "🗣️ Active Groups",
-            help="Number of groups where this POC has sent messages.",
-            width="small"
-        ),
-        "Total Messages Sent": column_config.Column(
-            "✉️ Total Messages",
-            help="Total number of messages sent by this POC.",
-            width="small"
-        ),
-    }
-    st.dataframe(poc_summary_df, column_config=poc_summary_column_config, hide_index=True)
-else:
-    st.info("No POC (Group Admin) data available for the selected filters.")
-
-
-st.header("📅 Message Sharing Trend in Groups") # Renamed header
-tab1, tab2 = st.tabs(["Hour-wise Trend", "Day-wise Trend"])
-
-with tab1:
-    st.subheader("Hour-wise Message Trend")
-    if not filtered_msgs.empty:
-        hour_wise_trend = filtered_msgs.groupby('hour').size().reset_index(name='Message Count')
-        hour_wise_trend['hour_label'] = hour_wise_trend['hour'].apply(lambda x: f"{x:02d}:00")
-
-        if not hour_wise_trend.empty:
-            fig = px.line(hour_wise_trend, x='hour_label', y='Message Count',
-                          title='Hour-wise Message Trend')
-            fig.update_layout(
-                xaxis_title='Hour',
-                xaxis_title_font_color='black', xaxis_tickfont_color='black',
-                yaxis_title_font_color='black', yaxis_tickfont_color='black'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+    @panel_fragment
+    def reaction_types_section(view):
+        """Reactions per type of the reacted-to message."""
+        # None when the selection has no messages or no reactions
+        reactions_mimetype_counts = panel_result(view, 'reaction_types', 'Reactions by Message Type')
+        # Use st.markdown for title to control wrapping and alignment
+        st.markdown("<h3 style='white-space: nowrap; text-align: center; font-size: 18px; font-weight: bold; color: #333333;'>👍 Reactions by Message Type</h3>", unsafe_allow_html=True)
+        if reactions_mimetype_counts is not None:
+            if not reactions_mimetype_counts.empty:
+                fig = figure_cache.get('reaction_types', reactions_mimetype_counts, bar_chart,
+                                       y='Reaction Count', colors=("#F58518", "#57A773", "#4C78A8"))
+                st.plotly_chart(fig, use_container_width=True)
         else:
-            st.info("No message data available for hour-wise analysis with the selected filters.")
-    else:
-        st.info("No message data available for hour-wise analysis with the selected filters.")
-
-with tab2:
-    st.subheader("Day-wise Message Trend")
-    if not filtered_msgs.empty:
-        day_wise_trend = filtered_msgs.groupby('date_new').size().reset_index(name='Message Count')
-        day_wise_trend['date_new'] = pd.to_datetime(day_wise_trend['date_new']) # Ensure datetime for Plotly
-
-        if not day_wise_trend.empty:
-            fig = px.line(day_wise_trend, x='date_new', y='Message Count',
-                          title='Day-wise Message Trend')
-            fig.update_layout(
-                xaxis_title='Date',
-                xaxis_title_font_color='black', xaxis_tickfont_color='black',
-                yaxis_title_font_color='black', yaxis_tickfont_color='black'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.info("Not enough message or reaction data to show reactions by Msg Type for the selected filters.")
+
+
+    @panel_fragment
+    def top_reacted_section(view):
+        """Most reacted messages; the number shown is this panel's own input."""
+        top_k = st.selectbox("Messages shown", TOP_REACTED_CHOICES, key='top_reacted_k')
+        st.subheader(f"Top {top_k} Most Reacted Messages")
+        # Engagement & Reactions (using filtered data)
+        top_reacted_msgs = panel_result(view, 'top_reacted', 'Top Reacted Messages', k=top_k)
+
+        if not top_reacted_msgs.empty:
+            # Define column configuration for top_reacted_msgs
+            top_reacted_msgs_column_config = {
+                "Message": column_config.Column(
+                    "💬 Message Content",
+                    help="The content of the message.",
+                    width="large"
+                ),
+                "Msg Type": column_config.Column(
+                    "📄 Message Type",
+                    help="The type of the message (e.g., text, image, video).",
+                    width="medium"
+                ),
+                "No. of Reactions": column_config.Column(
+                    "👍 Reactions Count",
+                    help="The total number of reactions received by the message.",
+                    width="small"
+                ),
+            }
+            st.dataframe(top_reacted_msgs, column_config=top_reacted_msgs_column_config, hide_index=True)
         else:
-            st.info("No message data available for day-wise analysis with the selected filters.")
-    else:
-        st.info("No message data available for day-wise analysis with the selected filters.")
+            st.info("No reaction data available for the selected filters.")
+
+
+    @panel_fragment
+    def add_leave_section(view):
+        """Participants added and left per group."""
+        st.subheader("Participants Added and Left by Group")
+        # Added/Left per group from the rollup cube, only groups where participants were added or left
+        add_leave_table = paged_result(view, 'add_leave', 'Participants Added and Left')
+
+        if len(add_leave_table):
+            # Define column configuration for add_leave_summary_df
+            add_leave_summary_column_config = {
+                "Group Name": column_config.Column(
+                    "👥 Group Name",
+                    help="The name of the WhatsApp group.",
+                    width="large"
+                ),
+                "Booth Number": column_config.Column(
+                    "🎪 Booth Number",
+                    help="The associated booth number for the group.",
+                    width="medium"
+                ),
+                "Participants Added": column_config.Column(
+                    "➕ Participants Added",
+                    help="Number of participants added to this group.",
+                    width="small"
+                ),
+                "Participants Left": column_config.Column(
+                    "➖ Participants Left",
+                    help="Number of participants who left this group.",
+                    width="small"
+                ),
+            }
+            st.caption("Select a group to see its messages.")
+            selected = show_table(add_leave_table, 'add_leave', add_leave_summary_column_config, selectable=True)
+            if selected is not None:
+                group, booth = selected['Group Name'], selected['Booth Number']
+                st.markdown(f"**Messages in {group} (booth {booth})**")
+                show_table(message_result(view, 'Group Messages', group=group, booth=booth),
+                           'group_messages', message_column_config)
+        else:
+            st.info("No add/leave data available for the selected filters where participants were added or left.")
+
+
+    @panel_fragment
+    def poc_section(view):
+        """POC (group admin) metrics."""
+        st.header("🧑‍💼 POC Analysis (Group Admins as POCs)")
+        # POC Analysis: Consider group admins as POCs
+        # Metrics for every admin come from one grouped aggregation over the filtered frames
+        poc_table = paged_result(view, 'poc', 'POC Analysis')
+
+        if len(poc_table):
+            # Define column configuration for poc_summary_df
+            poc_summary_column_config = {
+                "POC Phone Number": column_config.Column(
+                    "📞 POC Number",
+                    help="The phone number of the Point of Contact (Group Admin).",
+                    width="medium"
+                ),
+                "Total Groups (Admin Of)": column_config.Column(
+                    "🏘️ Groups Admin Of",
+                    help="Total number of groups where this POC is an admin.",
+                    width="small"
+                ),
+                "Active Groups (Sent Msgs)": column_config.Column(
+                    "🗣️ Active Groups",
+                    help="Number of groups where this POC has sent messages.",
+                    width="small"
+                ),
+                "Total Messages Sent": column_config.Column(
+                    "✉️ Total Messages",
+                    help="Total number of messages sent by this POC.",
+                    width="small"
+                ),
+                "Reactions Received": column_config.Column(
+                    "👍 Reactions Received",
+                    help="Reactions on messages sent by this POC.",
+                    width="small"
+                ),
+                "Last Active Date": column_config.DateColumn(
+                    "🕒 Last Active",
+                    help="Date of the last message sent by this POC.",
+                    width="small"
+                ),
+                "Messages per Group": column_config.NumberColumn(
+                    "📈 Msgs per Group",
+                    help="Messages sent per active group.",
+                    format="%.2f",
+                    width="small"
+                ),
+            }
+            st.caption("Select a POC to see the messages they sent.")
+            selected = show_table(poc_table, 'poc', poc_summary_column_config, selectable=True)
+            if selected is not None:
+                phone = selected['POC Phone Number']
+                st.markdown(f"**Messages sent by {phone}**")
+                show_table(message_result(view, 'POC Messages', sender=phone), 'poc_messages', message_column_config)
+        else:
+            st.info("No POC (Group Admin) data available for the selected filters.")
+
+
+    @panel_fragment
+    def trend_section(view):
+        """Hour-wise and day-wise trends, one lazily rendered tab each."""
+        # Tabs rerun this fragment when switched and only the open one is computed and charted
+        tab1, tab2 = st.tabs(["Hour-wise Trend", "Day-wise Trend"], key='trend_tab', on_change='rerun')
+
+        if tab1.open:
+            with tab1:
+                st.subheader("Hour-wise Message Trend")
+                hour_wise_trend = panel_result(view, 'hourly', 'Hour-wise Trend')
+
+                if not hour_wise_trend.empty:
+                    fig = figure_cache.get('hourly', hour_wise_trend, trend_chart,
+                                           x='hour_label', title='Hour-wise Message Trend', xaxis_title='Hour')
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.info("No message data available for hour-wise analysis with the selected filters.")
+
+        if tab2.open:
+            with tab2:
+                st.subheader("Day-wise Message Trend")
+                day_wise_trend = panel_result(view, 'daily', 'Day-wise Trend') # date_new is datetime for Plotly
+
+                if not day_wise_trend.empty:
+                    # Long ranges are summed per week or month so the chart stays within a point budget
+                    day_wise_trend, bucket = resample_trend(day_wise_trend)
+                    bucket_title = TREND_BUCKETS[bucket][1]
+                    fig = figure_cache.get('daily', day_wise_trend, trend_chart,
+                                           x='date_new', title=f'{bucket_title} Message Trend', xaxis_title='Date')
+                    st.plotly_chart(fig, use_container_width=True)
+                    if bucket != 'day':
+                        st.caption(f"{len(day_wise_trend)} {bucket}s shown; each point is the total for the {bucket} starting on its date.")
+                else:
+                    st.info("No message data available for day-wise analysis with the selected filters.")
+
+
+    overview_section(view)
+
+    # Create three columns for the charts with explicit widths and gap
+    chart_col1, chart_col2, chart_col3 = st.columns([1, 1, 1], gap="medium")
+    with chart_col1:
+        group_types_section(view)
+    with chart_col2:
+        message_types_section(view)
+    with chart_col3:
+        reaction_types_section(view)
+
+    st.header("🚦 Group Health")
+    top_reacted_section(view)
+    add_leave_section(view)
+    poc_section(view)
+
+    st.header("📅 Message Sharing Trend in Groups") # Renamed header
+    trend_section(view)
+
+
+    # --- Profile of this run ---
+    total_seconds = profiler.finish()
+    if debug_mode:
+        with st.sidebar.expander("⏱️ Profile (this run)"):
+            st.toggle("Trace allocations", key='profile_trace_memory',
+                      help="Record allocation deltas per section from the next run on (slows the dashboard down).")
+            st.toggle("Append runs to log", key='profile_log', help=f"Each run (and panel rerun) is appended to {default_log_path()} as one JSON line.")
+            st.caption(f"Total {total_seconds:.3f}s")
+            st.dataframe(profiler.frame(), hide_index=True)
+            if 'fragment_profile' in st.session_state:
+                fragment, fragment_seconds, records = st.session_state['fragment_profile']
+                st.caption(f"Last panel rerun: {fragment}, {fragment_seconds:.3f}s")
+                st.dataframe(pd.DataFrame(records), hide_index=True)
+            if pipeline is not None:
+                st.caption("Preprocessing stages (built once per dataset)")
+                st.dataframe(pd.DataFrame({'stage': list(pipeline.timings), 'seconds': list(pipeline.timings.values())}), hide_index=True)
+    profile_log = profile_log_path()
+    if profile_log:
+        profiler.append_log(
+            profile_log,
+            data_key=data_key,
+            filters={'start_date': start_date, 'end_date': end_date, 'group': group_filter, 'booth': booth_filter},
+        )
+finally:
+    profiler.finish()